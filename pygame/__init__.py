@@ -5,4 +5,5 @@
 # example import below, you can define it in another file and import
 # it into this module with the name 'Player':
 
-from pygame.player import Player
\ No newline at end of file
+from pygame.player import Player, ParallelPlayer, MCTSPlayer, \
+    PonderingPlayer, PonderingMCTSPlayer
@@ -3,7 +3,9 @@ Board representation
 """
 
 from referee.game import COLOURS
+from pygame.tables import neighbour_table, capture_table, influence_table, zobrist_table
 from collections import defaultdict
+from functools import lru_cache
 
 RED = COLOURS[0]
 BLUE = COLOURS[1]
@@ -19,8 +21,47 @@ class Board:
         """
         self.n = n
         self.occupied = {}  # store tokens on the board
+        self.empty = set(neighbour_table(n))    # cells without a token
         self.size = n ** 2
-        self.same_count = {} # count number of times a configuration occured (to avoid draws)
+        self.same_count = {} # count number of times a position hash occured (to avoid draws)
+        self.neighbours = neighbour_table(n)          # in-bounds neighbours of each cell
+        self.capture_patterns = capture_table(n)      # in-bounds capture diamonds of each cell
+        self.keys = zobrist_table(n)                  # zobrist keys of each cell and colour
+        self.hash = 0                                 # zobrist hash of the current position
+
+        # Union-find of groups of adjacent same colour tokens, cell (r, q) is
+        # node r * n + q. The root of a group keeps the lines (rows for Red,
+        # columns for Blue) the group covers as a bitmask: covering the
+        # first and the last line, the group joins the player's edges.
+        self.parent = list(range(n * n))
+        self.rank = [0] * (n * n)
+        self.span = [0] * (n * n)
+        self.ends = 1 | 1 << (n - 1)
+        self.line_counts = _line_counts(n)  # number of lines in each bitmask
+        self.joins = []     # (coord, unions made) of each placement, newest last
+        self.undo_stack = []    # (coord, player, captures, regroup() after captures, distances before) of each move
+
+        # Evaluation terms kept up to date as tokens come and go: the tokens
+        # of each player, for each player the number of groups covering 0,
+        # 1, ... n lines and the number joining its edges, and the
+        # connection distance of each player once known (None until then).
+        # When the distance fields of the position are known too (see
+        # evaluate.distance_fields()), make_move() works out the distances
+        # after the move from them without a search.
+        self.counts = {RED: 0, BLUE: 0}
+        self.span_groups = {RED: [0] * (n + 1), BLUE: [0] * (n + 1)}
+        self.connected = {RED: 0, BLUE: 0}
+        self.distances = {RED: None, BLUE: None}
+        self.fields = {RED: None, BLUE: None}
+
+        # Capture index: the empty cells where each player placing a token
+        # captures, or sets up a capture (the opposite cell of the diamond
+        # is empty). Cells whose diamonds changed are recomputed when next
+        # asked for, see refresh_captures().
+        self.influence = influence_table(n)
+        self.capture_cells = {RED: set(), BLUE: set()}
+        self.threat_cells = {RED: set(), BLUE: set()}
+        self.dirty = set()
 
     def inbounds(self, coord):
         """
@@ -34,20 +75,50 @@ class Board:
         Update the board state when a STEAL action has happened.
         """
         r, q = list(self.occupied)[0]
-        self.occupied.pop((r, q))
+        player = self.occupied.pop((r, q))
+        self.hash ^= self.keys[(r, q)][player]
+        self.counts[player] -= 1
+        self.empty.add((r, q))
         self.occupied[(q, r)] = BLUE
+        self.counts[BLUE] += 1
+        self.empty.discard((q, r))
+        self.hash ^= self.keys[(q, r)][BLUE]
+        self.dirty.update(self.influence[(r, q)])
+        self.dirty.update(self.influence[(q, r)])
+        self.forget_distances()
+        self.rebuild_groups()
 
     def place_update(self, player, r, q):
         """ 
         Update the board state when a PLACE action has happened.
         """
         self.occupied[(r, q)] = player
+        self.empty.discard((r, q))
+        self.hash ^= self.keys[(r, q)][player]
+        self.counts[player] += 1
+        self.dirty.update(self.influence[(r, q)])
+        self.forget_distances()
+        self.joins.append(((r, q), self.link((r, q), player)))
 
     def remove(self, r, q):
         """
         Remove a token from the board.
         """
-        self.occupied.pop((r, q))
+        player = self.occupied.pop((r, q))
+        self.hash ^= self.keys[(r, q)][player]
+        self.counts[player] -= 1
+        self.empty.add((r, q))
+        self.dirty.update(self.influence[(r, q)])
+        self.forget_distances()
+        # Undoing the latest placement is cheap, anything else may split
+        # the token's group: group its tokens again
+        if self.joins and self.joins[-1][0] == (r, q):
+            self.unlink((r, q), player, self.joins.pop()[1])
+        else:
+            changed = {node for node, _, _, _ in self.regroup(player, [(r, q)])[0]}
+            n = self.n
+            self.joins = [join for join in self.joins
+                          if join[0][0] * n + join[0][1] not in changed]
         
     def capture_update(self, captures):
         """
@@ -56,73 +127,140 @@ class Board:
         for i in captures:
             self.remove(i[0], i[1])
 
+    def make_move(self, player, coord):
+        """
+        Place a token and apply its captures, recording on the undo stack
+        how to take the move back. Returns the captured coordinates.
+        """
+        r, q = coord
+        known = (self.distances, self.fields)
+        self.place_update(player, r, q)
+        captures = self.valid_capture(player, r, q)
+        groups = None
+        if captures:
+            # Captures may split the opponent's groups: group them again,
+            # keeping the nodes changed to restore on undo
+            other = BLUE if player == RED else RED
+            for c in captures:
+                self.hash ^= self.keys[c][self.occupied.pop(c)]
+                self.empty.add(c)
+                self.dirty.update(self.influence[c])
+            self.counts[other] -= len(captures)
+            groups = self.regroup(other, captures)
+        else:
+            self.distances = self.distances_after(player, coord, known[1])
+        self.undo_stack.append((coord, player, captures, groups, known))
+        return captures
+
+    def unmake_move(self):
+        """
+        Take back the latest move made by make_move().
+        """
+        coord, player, captures, groups, known = self.undo_stack.pop()
+        if captures:
+            other = BLUE if player == RED else RED
+            for c in captures:
+                self.occupied[c] = other
+                self.empty.discard(c)
+                self.hash ^= self.keys[c][other]
+                self.dirty.update(self.influence[c])
+            self.counts[other] += len(captures)
+            self.restore_groups(other, groups)
+        self.remove(coord[0], coord[1])
+        self.distances, self.fields = known
+        return coord
+
+    def forget_distances(self):
+        """
+        The position changed: the connection distances are not known.
+        """
+        self.distances = {RED: None, BLUE: None}
+        self.fields = {RED: None, BLUE: None}
+
+    def distances_after(self, player, coord, fields):
+        """
+        Connection distances after the player places a token on the empty
+        coord without capturing, from the distance fields of the position
+        before (None where not known).
+
+        The mover's paths through coord become one cheaper: its distance is
+        the shorter of the old one and the cheapest path through coord. The
+        other player's paths through coord are blocked, which only matters
+        if all of its shortest paths go through coord (see
+        evaluate.distance_fields()).
+        """
+        distances = {RED: None, BLUE: None}
+        for colour, known in fields.items():
+            if known is None:
+                continue
+            distance, from_start, from_end, layers = known
+            if coord in from_start and coord in from_end:
+                # Cost of the cheapest path through coord (counted once)
+                via = from_start[coord] + from_end[coord] - 1
+                if colour == player:
+                    distance = min(distance, via - 1)
+                elif via == distance and layers[from_start[coord]] == 1:
+                    # Every shortest path went through coord
+                    continue
+            distances[colour] = distance
+        return distances
+
     def valid_capture(self, player, r, q):
         """
         Check if a CAPTURE action is possible.
         """
         captures = set()
-        # Top
-        if self.valid_capture_diamond(player, (r+2, q-1), (r+1, q-1), (r+1, q)):
-            captures.add((r+1, q-1))
-            captures.add((r+1, q))
-        # Top right close
-        if self.valid_capture_diamond(player, (r+1, q), (r+1, q-1), (r, q+1)):
-            captures.add((r+1, q-1))
-            captures.add((r, q+1))
-        # Top right far
-        if self.valid_capture_diamond(player, (r+1, q+1), (r+1, q), (r, q+1)):
-            captures.add((r+1, q))
-            captures.add((r, q+1))
-        # Right
-        if self.valid_capture_diamond(player, (r, q+1), (r+1, q), (r-1, q+1)):
-            captures.add((r+1, q))
-            captures.add((r-1, q+1))
-        # Bottom right far
-        if self.valid_capture_diamond(player, (r-1, q+2), (r, q+1), (r-1, q+1)):
-            captures.add((r, q+1))
-            captures.add((r-1, q+1))
-        # Bottom right close
-        if self.valid_capture_diamond(player, (r-1, q+1), (r-1, q), (r, q+1)):
-            captures.add((r-1, q))
-            captures.add((r, q+1))
-        # Bottom
-        if self.valid_capture_diamond(player, (r-2, q+1), (r-1, q), (r-1, q+1)):
-            captures.add((r-1, q))
-            captures.add((r-1, q+1))
-        # Bottom left far
-        if self.valid_capture_diamond(player, (r-1, q-1), (r, q-1), (r-1, q)):
-            captures.add((r, q-1))
-            captures.add((r-1, q))
-        # Bottom left close
-        if self.valid_capture_diamond(player, (r-1, q), (r, q-1), (r-1, q+1)):
-            captures.add((r, q-1))
-            captures.add((r-1, q+1))
-        # Left
-        if self.valid_capture_diamond(player, (r, q-1), (r-1, q), (r+1, q-1)):
-            captures.add((r-1, q))
-            captures.add((r+1, q-1))
-        # Top left far
-        if self.valid_capture_diamond(player, (r+1, q-2), (r, q-1), (r+1, q-1)):
-            captures.add((r, q-1))
-            captures.add((r+1, q-1))
-        # Top left close
-        if self.valid_capture_diamond(player, (r+1, q-1), (r, q-1), (r+1, q)):
-            captures.add((r, q-1))
-            captures.add((r+1, q))
+        occupied = self.occupied
+        # Only the in-bounds diamonds around (r, q) are in the table
+        for diag, left, right in self.capture_patterns[(r, q)]:
+            if occupied.get(diag) == player and left in occupied and right in occupied:
+                if occupied[left] != player and occupied[right] != player:
+                    captures.add(left)
+                    captures.add(right)
         return captures
 
-    def valid_capture_diamond(self, player, diag, left, right):
+    def refresh_captures(self):
+        """
+        Bring the capture index up to date for the cells that changed.
+        """
+        dirty = self.dirty
+        if not dirty:
+            return
+        occupied = self.occupied
+        capture_cells = self.capture_cells
+        threat_cells = self.threat_cells
+        for player in (RED, BLUE):
+            capture_cells[player].difference_update(dirty)
+            threat_cells[player].difference_update(dirty)
+        for cell in dirty:
+            if cell in occupied:
+                continue
+            for diag, left, right in self.capture_patterns[cell]:
+                other = occupied.get(left)
+                if other is None or occupied.get(right) != other:
+                    continue
+                player = BLUE if other == RED else RED
+                diag_token = occupied.get(diag)
+                if diag_token == player:
+                    capture_cells[player].add(cell)
+                elif diag_token is None:
+                    threat_cells[player].add(cell)
+        dirty.clear()
+
+    def capture_moves(self, player):
         """
-        Check if a valid capture diamond is formed.
+        Empty cells where the player placing a token captures (do not modify).
         """
-        if (not self.inbounds(diag)) or (not self.inbounds(left)) or (not self.inbounds(right)):
-            return False
+        self.refresh_captures()
+        return self.capture_cells[player]
 
-        if (diag in self.occupied) and (left in self.occupied) and (right in self.occupied):
-            if self.occupied[diag] == player and self.occupied[left] != player and \
-                                                self.occupied[right] != player:
-                return True
-        return False
+    def threat_moves(self, player):
+        """
+        Empty cells where the player placing a token sets up a capture for
+        the next move (do not modify).
+        """
+        self.refresh_captures()
+        return self.threat_cells[player]
 
     def is_occupied(self, r, q):
         """
@@ -130,49 +268,202 @@ class Board:
         """   
         return (r, q) in self.occupied   
 
-    def end_game(self):        
+    def end_game(self):
         """
         Check if the game ends and return the winner.
         """
-        for r, q in self.occupied.keys():
-            if r == 0 and self.occupied[(r, q)] == RED:
-                if self.dfs_search((r, q), lambda t: t[0] == self.n - 1, RED):
-                    return RED
-        
-        for r, q in self.occupied.keys():
-            if q == 0 and self.occupied[(r, q)] == BLUE:
-                if self.dfs_search((r, q), lambda t: t[1] == self.n - 1, BLUE):
-                    return BLUE
+        for player in (RED, BLUE):
+            if self.connected[player]:
+                return player
         return None
 
-    def dfs_search(self, start, reach_goal, player):
+    def find(self, node):
+        """
+        Find the representative node of a group.
+        No path compression, so that unions can be undone.
+        """
+        parent = self.parent
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    def union(self, player, a, b):
         """
-        Perform a depth first search.
+        Merge the groups of two of the player's tokens (union by rank), and
+        the lines they cover. Returns the change made, or None if already
+        in the same group.
         """
-        explored = []
-        nbs = self.find_neighbours(start, player)
-        explored.append(start)
-        for nb in nbs:
-            if nb not in explored:
-                end = self.token_crawler(explored, nb, reach_goal, player)
-                if end:
-                    return True
-        return False
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return None
+        if self.rank[a] < self.rank[b]:
+            a, b = b, a
+        self.parent[b] = a
+        bumped = self.rank[a] == self.rank[b]
+        if bumped:
+            self.rank[a] += 1
+        span = self.span
+        old_span = span[a]
+        span[a] = old_span | span[b]
+        self.count_group(player, old_span, -1)
+        self.count_group(player, span[b], -1)
+        self.count_group(player, span[a], 1)
+        return (b, a, bumped, old_span)
 
-    def token_crawler(self, explored, start, reach_goal, player):
+    def count_group(self, player, span, change):
         """
-        DFS implementation, crawl adjacent tokens.
+        Count a group of the player covering the lines of span into (change
+        1) or out of (change -1) the group terms.
         """
-        if reach_goal(start):
-            return True
-        explored.append(start)
-        nbs = self.find_neighbours(start, player)
-        for nb in nbs:
-            if nb not in explored:
-                end = self.token_crawler(explored, nb, reach_goal, player)
-                if end:
-                    return True
-        return False
+        self.span_groups[player][self.line_counts[span]] += change
+        if span & self.ends == self.ends:
+            self.connected[player] += change
+
+    def link(self, coord, player):
+        """
+        Join a newly placed token to its neighbouring groups. Returns the
+        unions made.
+        """
+        r, q = coord
+        n = self.n
+        node = r * n + q
+        self.span[node] = 1 << (r if player == RED else q)
+        self.count_group(player, self.span[node], 1)
+
+        unions = []
+        for nb in self.neighbours[coord]:
+            if self.occupied.get(nb) == player:
+                union = self.union(player, node, nb[0] * n + nb[1])
+                if union:
+                    unions.append(union)
+        return unions
+
+    def wins(self, player, coord):
+        """
+        Check if placing a token on the (empty) coord connects the player's
+        edges. Captures only remove opponent tokens, so they never matter.
+        """
+        r, q = coord
+        n = self.n
+        span = self.span
+        lines = 1 << (r if player == RED else q)
+        for nb in self.neighbours[coord]:
+            if self.occupied.get(nb) == player:
+                lines |= span[self.find(nb[0] * n + nb[1])]
+        return lines & self.ends == self.ends
+
+    def unlink(self, coord, player, unions):
+        """
+        Undo the unions made by link() for the player's token at coord.
+        """
+        span = self.span
+        for child, root, bumped, old_span in reversed(unions):
+            self.parent[child] = child
+            if bumped:
+                self.rank[root] -= 1
+            self.count_group(player, span[root], -1)
+            self.count_group(player, span[child], 1)
+            self.count_group(player, old_span, 1)
+            span[root] = old_span
+        node = coord[0] * self.n + coord[1]
+        self.count_group(player, span[node], -1)
+        span[node] = 0
+
+    def regroup(self, player, cells):
+        """
+        Group again the player's tokens that were in one group with any of
+        the cells, whose tokens were just taken off the board (which may
+        split groups, and union-find cannot). Only those groups change: a
+        flood fill over the player's tokens from around the cells finds
+        each new group, which is made a tree of one level. Returns the old
+        (node, parent, rank, span) of the nodes changed and the old group
+        terms of the player, to restore on undo.
+        """
+        n = self.n
+        occupied = self.occupied
+        neighbours = self.neighbours
+        seen = set(cells)
+        groups = []
+        for cell in cells:
+            for first in neighbours[cell]:
+                if first in seen or occupied.get(first) != player:
+                    continue
+                seen.add(first)
+                group = [first]
+                for coord in group:
+                    for nb in neighbours[coord]:
+                        if nb not in seen and occupied.get(nb) == player:
+                            seen.add(nb)
+                            group.append(nb)
+                groups.append(group)
+
+        parent, rank, span = self.parent, self.rank, self.span
+        terms = (list(self.span_groups[player]), self.connected[player])
+        old = []
+        for r, q in seen:
+            node = r * n + q
+            if parent[node] == node:
+                self.count_group(player, span[node], -1)
+            old.append((node, parent[node], rank[node], span[node]))
+        for r, q in cells:
+            node = r * n + q
+            parent[node] = node
+            rank[node] = 0
+            span[node] = 0
+
+        axis = 0 if player == RED else 1
+        for group in groups:
+            root = group[0][0] * n + group[0][1]
+            lines = 0
+            for coord in group:
+                node = coord[0] * n + coord[1]
+                parent[node] = root
+                rank[node] = 0
+                lines |= 1 << coord[axis]
+            rank[root] = 1 if len(group) > 1 else 0
+            span[root] = lines
+            self.count_group(player, lines, 1)
+        return old, terms
+
+    def restore_groups(self, player, groups):
+        """
+        Undo regroup(), given what it returned.
+        """
+        old, (span_groups, connected) = groups
+        parent, rank, span = self.parent, self.rank, self.span
+        for node, old_parent, old_rank, old_span in old:
+            parent[node] = old_parent
+            rank[node] = old_rank
+            span[node] = old_span
+        self.span_groups[player] = span_groups
+        self.connected[player] = connected
+
+    def rebuild_groups(self):
+        """
+        Rebuild the union-find from the tokens on the board.
+        """
+        n = self.n
+        self.parent = list(range(n * n))
+        self.rank = [0] * (n * n)
+        self.span = [0] * (n * n)
+        self.span_groups = {RED: [0] * (n + 1), BLUE: [0] * (n + 1)}
+        self.connected = {RED: 0, BLUE: 0}
+        self.joins = []
+        for coord, player in self.occupied.items():
+            self.link(coord, player)
+
+    def record_position(self):
+        """
+        Count one more occurrence of the current position.
+        """
+        self.same_count[self.hash] = self.same_count.get(self.hash, 0) + 1
+
+    def repeats(self):
+        """
+        Returns number of times the current position has occurred.
+        """
+        return self.same_count.get(self.hash, 0)
 
     def is_first_move(self, player):
         """
@@ -187,53 +478,32 @@ class Board:
         """
         Find all neighbouring same tokens or coordinates.
         """
-        (r, q) = coord
-        nb_1 = (r + 1, q - 1)       # Top left
-        nb_2 = (r,     q - 1)       # Left
-        nb_3 = (r - 1, q)           # Bottom left
-        nb_4 = (r + 1, q)           # Top right
-        nb_5 = (r,     q + 1)       # Right
-        nb_6 = (r - 1, q + 1)       # Bottom right
-        neighbours = [nb_1, nb_2, nb_3, nb_4, nb_5, nb_6]
-        valid_nbs = list(filter(lambda nb: self.inbounds(nb), neighbours))
         if player:
-            player_nbs = list(filter(lambda nb: nb in self.occupied and self.occupied[nb] == player, valid_nbs))
-            return player_nbs
-        else:
-            return valid_nbs
+            occupied = self.occupied
+            return [nb for nb in self.neighbours[coord] if occupied.get(nb) == player]
+        return list(self.neighbours[coord])
 
     def find_empty_neighbours(self, coord):
         """
         Find all neighbouring empty coordinates.
         """
-        (r, q) = coord
-        nb_1 = (r + 1, q - 1)       # Top left
-        nb_2 = (r,     q - 1)       # Left
-        nb_3 = (r - 1, q)           # Bottom left
-        nb_4 = (r + 1, q)           # Top right
-        nb_5 = (r,     q + 1)       # Right
-        nb_6 = (r - 1, q + 1)       # Bottom right
-        neighbours = [nb_1, nb_2, nb_3, nb_4, nb_5, nb_6]
-        valid_nbs = list(filter(lambda nb: self.inbounds(nb), neighbours))
-        empty_nbs = list(filter(lambda nb: nb not in self.occupied, valid_nbs))
-        return empty_nbs
+        occupied = self.occupied
+        return [nb for nb in self.neighbours[coord] if nb not in occupied]
 
     def capture_danger(self, opponent, r, q):
         """
         Check if our move may cause a capture to us.
         """
-        empty_nbs = self.find_empty_neighbours((r, q))
-        for (nr, nq) in empty_nbs:
-            if self.valid_capture(opponent, nr, nq):
-                return True
-        return False
+        captures = self.capture_moves(opponent)
+        return any(nb in captures for nb in self.neighbours[(r, q)])
     
     def almost_capture(self, player, r, q):
         """
         Check if we can perform capture in two moves.
         """
-        self.occupied[(r, q)] = player
+        self.place_update(player.colour, r, q)
         choices = defaultdict(int)
+        capture_moves = self.capture_moves(player.colour)
         # Find neighbours that are opponents
         oppo_nbs = self.find_neighbours((r, q), player.oppo)
         if oppo_nbs:
@@ -241,12 +511,11 @@ class Board:
                 emp_nbs = self.find_empty_neighbours(op)
                 for nb in emp_nbs:
                     # Check if capture can happen by placing a token
-                    captures = self.valid_capture(player.colour, nb[0], nb[1])
-                    if captures:
+                    if nb in capture_moves:
                         # Increase desirability 
-                        choices[nb] += len(captures) 
+                        choices[nb] += len(self.valid_capture(player.colour, nb[0], nb[1]))
 
-        self.occupied.pop((r, q))
+        self.remove(r, q)
         if choices:
             # Get the coordinate with max desirability
             coord = max(choices, key=choices.get)
@@ -268,7 +537,7 @@ class Board:
         """
         Returns number of tokens of a player.
         """
-        return list(self.occupied.values()).count(player)
+        return self.counts[player]
 
     def board_center(self):
         """
@@ -276,15 +545,10 @@ class Board:
         """
         return (self.n // 2, self.n // 2)
 
-    def recover_board(self, player, pop_token, add_list):
-        """
-        Return board to original state after trying potential moves.
-        """
-        if pop_token:
-            self.occupied.pop(pop_token)
-        if add_list:
-            for i in add_list:
-                if player == RED:
-                    self.occupied[(i[0], i[1])] = BLUE
-                else:
-                    self.occupied[(i[0], i[1])] = RED
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def _line_counts(n):
+    """
+    Number of lines in each bitmask of the lines of an n * n board.
+    """
+    return [bin(mask).count("1") for mask in range(1 << n)]
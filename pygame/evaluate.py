@@ -0,0 +1,278 @@
+"""
+Position evaluation: how many more tokens each side needs to connect its
+two edges, and the groups and tokens of both sides
+"""
+
+import numpy as np
+from collections import deque, namedtuple
+from functools import lru_cache
+from pygame.tables import HEX_STEPS
+from pygame.board import RED, BLUE
+
+def connection_distance(board, player):
+    """
+    Fewest empty cells the player must fill to connect its two edges,
+    passing through its own tokens for free and never through the
+    opponent's. Returns board.n + 1 when the player is cut off.
+
+    A 0-1 breadth first search from the player's first edge: own tokens
+    are pushed at the front of the queue (no cost), empty cells at the back.
+    """
+    n = board.n
+    occupied = board.occupied
+    neighbours = board.neighbours
+    other = BLUE if player == RED else RED
+
+    # Red connects row 0 to row n-1, Blue column 0 to column n-1
+    axis = 0 if player == RED else 1
+    starts = _edge_cells(n, player)
+
+    best = {}
+    queue = deque()
+    for cell in starts:
+        token = occupied.get(cell)
+        if token == other:
+            continue
+        if token == player:
+            best[cell] = 0
+            queue.appendleft((0, cell))
+        else:
+            best[cell] = 1
+            queue.append((1, cell))
+
+    unreached = n + 1
+    while queue:
+        distance, cell = queue.popleft()
+        if distance > best[cell]:
+            continue
+        if cell[axis] == n - 1:
+            return distance
+        for nb in neighbours[cell]:
+            token = occupied.get(nb)
+            if token == other:
+                continue
+            if token == player:
+                if best.get(nb, unreached) > distance:
+                    best[nb] = distance
+                    queue.appendleft((distance, nb))
+            elif best.get(nb, unreached) > distance + 1:
+                best[nb] = distance + 1
+                queue.append((distance + 1, nb))
+    return unreached
+
+def connection_distances(board):
+    """
+    Connection distances of Red and Blue.
+    """
+    return known_distance(board, RED), known_distance(board, BLUE)
+
+def known_distance(board, player):
+    """
+    connection_distance() of the player, kept on the board until the
+    position changes (make_move() may already know it).
+    """
+    distance = board.distances[player]
+    if distance is None:
+        distance = board.distances[player] = connection_distance(board, player)
+    return distance
+
+def distance_field(board, player, end=False):
+    """
+    Fewest empty cells the player must fill to reach each cell from its
+    first edge (or its second, if end), counting the cell itself. Cells
+    the player cannot reach are left out. The same 0-1 breadth first
+    search as connection_distance(), carried on over the whole board.
+    """
+    occupied = board.occupied
+    neighbours = board.neighbours
+    other = BLUE if player == RED else RED
+
+    best = {}
+    queue = deque()
+    for cell in _edge_cells(board.n, player, end):
+        token = occupied.get(cell)
+        if token == other:
+            continue
+        distance = 0 if token == player else 1
+        best[cell] = distance
+        queue.append((distance, cell))
+
+    while queue:
+        distance, cell = queue.popleft()
+        if distance > best[cell]:
+            continue
+        for nb in neighbours[cell]:
+            token = occupied.get(nb)
+            if token == other:
+                continue
+            step = 0 if token == player else 1
+            if best.get(nb, distance + 2) > distance + step:
+                best[nb] = distance + step
+                if step:
+                    queue.append((distance + 1, nb))
+                else:
+                    queue.appendleft((distance, nb))
+    return best
+
+def distance_fields(board, player):
+    """
+    Work out the distance fields of the player for the position, from each
+    of its edges, so that make_move() can tell its connection distance
+    after any move from here without a search (unless the move captures,
+    or takes the one empty cell all its shortest paths share at some
+    distance from the first edge). Worth it before trying many moves from
+    one position, e.g. just above the leaves.
+
+    A shortest path fills exactly one empty cell at each distance 1, 2, ...
+    from the first edge, so the number of empty cells on shortest paths at
+    each distance (the layers) tells whether any of them can be avoided.
+    """
+    if board.fields[player] is not None:
+        return
+    n = board.n
+    occupied = board.occupied
+    from_start = distance_field(board, player)
+    from_end = distance_field(board, player, end=True)
+    distance = min((from_start[cell] for cell in _edge_cells(n, player, end=True)
+                    if cell in from_start), default=n + 1)
+    layers = [0] * (n * n + 2)
+    for cell, start in from_start.items():
+        if cell not in occupied and start + from_end.get(cell, n * n) - 1 == distance:
+            layers[start] += 1
+    board.fields[player] = (distance, from_start, from_end, layers)
+    board.distances[player] = distance
+
+@lru_cache(maxsize=None)
+def _edge_cells(n, player, end=False):
+    """
+    Cells of the player's first (or second, if end) edge: row 0 (n - 1)
+    for Red, column 0 (n - 1) for Blue.
+    """
+    line = n - 1 if end else 0
+    if player == RED:
+        return tuple((line, i) for i in range(n))
+    return tuple((i, line) for i in range(n))
+
+def criticals(board, player):
+    """
+    Lines covered by the player's longest groups, plus the number of such
+    groups when they cover more than 2 lines, from the number of groups
+    covering each number of lines the board keeps.
+    """
+    span_groups = board.span_groups[player]
+    critical_length = board.n
+    while critical_length and not span_groups[critical_length]:
+        critical_length -= 1
+
+    # Does not matter to the game (generally) if the length <= 2
+    if critical_length > 2:
+        return critical_length + span_groups[critical_length]
+    return critical_length
+
+# What evaluate() finds for one side:
+#   score      how good the position is for the side (higher is better)
+#   distance   connection_distance(), None when not computed
+#   criticals  lines covered by the side's longest groups, plus the number
+#              of such groups when they cover more than 2 lines
+#   groups     number of token groups
+#   tokens     the side's tokens
+SideEvaluation = namedtuple("SideEvaluation", "score distance criticals groups tokens")
+
+def evaluate(board, connection=True):
+    """
+    Evaluate the board for both sides at once, returns a SideEvaluation by
+    colour. The group terms of both sides are kept by the board.
+
+    The score is how close the side is to connecting (n minus the
+    connection distance) plus its lead in tokens, as search_score() finds
+    it. Without connection, the distances are skipped and criticals take
+    their place in the score.
+    """
+    n = board.n
+    tokens = {RED: [], BLUE: []}
+    for cell, colour in board.occupied.items():
+        tokens[colour].append(cell)
+
+    distances = connection_distances(board) if connection else (None, None)
+    lead = board.counts[RED] - board.counts[BLUE]
+    result = {}
+    for colour, distance, sign in ((RED, distances[0], 1), (BLUE, distances[1], -1)):
+        side_criticals = criticals(board, colour)
+        progress = side_criticals if distance is None else n - distance
+        result[colour] = SideEvaluation(progress + sign * lead, distance, side_criticals,
+                                        sum(board.span_groups[colour]), tokens[colour])
+    return result
+
+def search_score(board, player):
+    """
+    The score of evaluate() for the player, from the token counts and
+    connection distances the board keeps. In the search, make_move() can
+    mostly tell the distances from those of the position before.
+    """
+    n = board.n
+    other = BLUE if player == RED else RED
+    distance = known_distance(board, player)
+    return n - distance + board.counts[player] - board.counts[other]
+
+def greedy_scores(board, player):
+    """
+    The criticals of the player (as in evaluate()) after placing a token on
+    each cell, for every cell at once: an n * n array, -1 on occupied cells.
+    Captures are not applied.
+
+    The groups a token would join are the groups of its six neighbours.
+    Their line masks are or-ed together, and only the longest lines count
+    matter: a merge can make a new longest group or absorb some of the
+    current longest ones.
+    """
+    n = board.n
+    none = n * n                # node that is no group (covers no lines)
+    find = board.find
+    span = np.zeros(none + 1, dtype=np.int64)
+    span[:none] = board.span
+    length = _popcounts(n)[span]
+
+    # Group (root node) of each of the player's tokens
+    grid = np.full((n + 2, n + 2), none, dtype=np.int64)
+    for (r, q), colour in board.occupied.items():
+        if colour == player:
+            grid[r + 1, q + 1] = find(r * n + q)
+
+    # Groups each cell would join
+    joined = np.empty((6, n, n), dtype=np.int64)
+    for i, (dr, dq) in enumerate(HEX_STEPS):
+        joined[i] = grid[1 + dr:1 + dr + n, 1 + dq:1 + dq + n]
+    lines = np.arange(n)
+    if player == RED:
+        own_line = np.left_shift(1, lines)[:, None]
+    else:
+        own_line = np.left_shift(1, lines)[None, :]
+    merged = np.bitwise_or.reduce(span[joined], axis=0) | own_line
+    merged_length = _popcounts(n)[merged]
+
+    # Longest groups now, and how many of them each cell would absorb
+    span_groups = board.span_groups[player]
+    longest = n
+    while longest and not span_groups[longest]:
+        longest -= 1
+    joined.sort(axis=0)
+    distinct = np.ones(joined.shape, dtype=bool)
+    distinct[1:] = joined[1:] != joined[:-1]
+    absorbed = (distinct & (length[joined] == longest)).sum(axis=0)
+
+    # Longest length and number of longest groups after the placement
+    critical_length = np.maximum(merged_length, longest)
+    count = np.where(merged_length > longest, 1,
+                     np.where(merged_length == longest,
+                              span_groups[longest] - absorbed + 1, span_groups[longest]))
+    scores = critical_length + np.where(critical_length > 2, count, 0)
+    for (r, q), colour in board.occupied.items():
+        scores[r, q] = -1
+    return scores
+
+@lru_cache(maxsize=None)
+def _popcounts(n):
+    """
+    Number of bits set in each n-bit line mask.
+    """
+    return np.array([bin(mask).count("1") for mask in range(1 << n)], dtype=np.int64)
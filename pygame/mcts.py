@@ -0,0 +1,202 @@
+"""
+Monte Carlo Tree Search, an alternative to the minimax strategy
+"""
+
+import math
+import time
+import random
+from referee.game import _ACTION_PLACE
+from pygame.board import RED, BLUE
+from pygame.strategy import move_deadline
+
+# Exploration constant of UCT
+EXPLORATION = 0.4
+
+# Visits at which RAVE (all-moves-as-first) statistics and the node's own
+# statistics weigh the same
+RAVE_EQUIVALENCE = 300
+
+# Playouts longer than this many moves per cell are stopped as a draw
+# (captures can keep a playout from filling the board)
+PLAYOUT_LIMIT = 3
+
+# Iterations between two deadline checks
+CHECK_EVERY = 16
+
+def make_action(board, player):
+    """
+    Make decision for next move: grow the search tree until the deadline,
+    then play the most visited move.
+    """
+    # Take a win straight away
+    for cell in board.empty:
+        if board.wins(player.colour, cell):
+            return cell
+
+    if player.tree is None or player.tree.key != board.hash:
+        player.tree = SearchTree(board, player.colour)
+    tree = player.tree
+
+    deadline = move_deadline(board, player)
+    while True:
+        for _ in range(CHECK_EVERY):
+            tree.iterate(board)
+        if time.process_time() > deadline:
+            break
+    return tree.best_move()
+
+
+class Node:
+    """
+    A position in the search tree, reached by `colour` playing `move`.
+    Wins are counted for `colour`.
+    """
+    __slots__ = ("move", "colour", "parent", "children", "untried",
+                 "visits", "wins", "amaf_visits", "amaf_wins")
+
+    def __init__(self, move, colour, parent, untried):
+        self.move = move
+        self.colour = colour
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+        self.amaf_visits = 0
+        self.amaf_wins = 0
+
+    def score(self, log_visits):
+        """
+        UCT value blended with the RAVE value, from the mover's view.
+        """
+        beta = math.sqrt(RAVE_EQUIVALENCE / (3 * self.visits + RAVE_EQUIVALENCE))
+        value = self.wins / self.visits
+        if self.amaf_visits:
+            value = (1 - beta) * value + beta * self.amaf_wins / self.amaf_visits
+        return value + EXPLORATION * math.sqrt(log_visits / self.visits)
+
+
+class SearchTree:
+    """
+    Search tree rooted at the current position, kept between turns.
+    """
+
+    def __init__(self, board, to_move):
+        """
+        Start a tree at the board position, with `to_move` to play next.
+        """
+        other = BLUE if to_move == RED else RED
+        self.root = Node(None, other, None, list(board.empty))
+        self.key = board.hash
+
+    def advance(self, board, action, colour):
+        """
+        Move the root down to the position after `colour` played `action`,
+        keeping the subtree searched for it. The board must already have
+        the action applied.
+        """
+        if action[0] == _ACTION_PLACE:
+            move = (action[1], action[2])
+            for child in self.root.children:
+                if child.move == move:
+                    child.parent = None
+                    self.root = child
+                    self.key = board.hash
+                    return
+
+        # Not searched yet (or a STEAL): start over from this position
+        self.root = Node(None, colour, None, list(board.empty))
+        self.key = board.hash
+
+    def best_move(self):
+        """
+        The most visited move of the root.
+        """
+        return max(self.root.children, key=lambda child: child.visits).move
+
+    def iterate(self, board):
+        """
+        One round of selection, expansion, playout and backpropagation.
+        The board is at the root position before and after.
+        """
+        node = self.root
+        played = 0
+
+        # Selection
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.score(log_visits))
+            board.make_move(node.colour, node.move)
+            played += 1
+
+        # Expansion
+        if node.untried and not board.end_game():
+            i = random.randrange(len(node.untried))
+            move = node.untried[i]
+            node.untried[i] = node.untried[-1]
+            node.untried.pop()
+            colour = BLUE if node.colour == RED else RED
+            board.make_move(colour, move)
+            played += 1
+            child = Node(move, colour, node, list(board.empty))
+            node.children.append(child)
+            node = child
+
+        # Simulation
+        winner, moves = self.playout(board, node.colour)
+        played += len(moves)
+
+        # Backpropagation, with the moves each colour played for RAVE
+        firsts = {RED: set(), BLUE: set()}
+        for colour, move in moves:
+            firsts[colour].add(move)
+        while node is not None:
+            node.visits += 1
+            if winner == node.colour:
+                node.wins += 1
+            elif winner is None:
+                node.wins += 0.5
+            for child in node.children:
+                if child.move in firsts[child.colour]:
+                    child.amaf_visits += 1
+                    if winner == child.colour:
+                        child.amaf_wins += 1
+                    elif winner is None:
+                        child.amaf_wins += 0.5
+            if node.move is not None:
+                firsts[node.colour].add(node.move)
+            node = node.parent
+
+        # Return to the root position
+        for _ in range(played):
+            board.unmake_move()
+
+    def playout(self, board, last):
+        """
+        Fill the board with random moves (captures included) until someone
+        wins, `last` having just moved. Returns the winner (None for a draw)
+        and the (colour, move) pairs played, which stay on the board.
+        """
+        winner = board.end_game()
+        moves = []
+        if winner:
+            return winner, moves
+
+        cells = list(board.empty)
+        colour = BLUE if last == RED else RED
+        for _ in range(PLAYOUT_LIMIT * board.size):
+            if not cells:
+                break
+            i = random.randrange(len(cells))
+            cell = cells[i]
+            cells[i] = cells[-1]
+            cells.pop()
+            if board.wins(colour, cell):
+                winner = colour
+            moves.append((colour, cell))
+            captures = board.make_move(colour, cell)
+            if winner:
+                break
+            cells.extend(captures)
+            colour = BLUE if colour == RED else RED
+        return winner, moves
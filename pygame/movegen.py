@@ -0,0 +1,95 @@
+"""
+Move generator for the search, yielding the most promising moves first
+"""
+
+import random
+from collections import namedtuple
+from pygame.tables import area_table, edge_template_table
+from pygame.board import RED, BLUE
+
+# Order of the move stages
+_WIN, _CAPTURE, _THREAT, _KILLER, _QUIET = range(5)
+
+# Which moves the search considers on large boards: on boards of at least
+# min_size, only cells within hex distance radius of a token (root_radius
+# at the root of the search), see candidate_moves()
+Pruning = namedtuple("Pruning", "min_size radius root_radius")
+
+def ordered_moves(board, player, first=None, killers=(), history=None, cells=None):
+    """
+    Yield each empty cell (or each of the given cells) once: the given move
+    first (e.g. from the transposition table), then winning moves, captures,
+    capture threats, killer moves, and the rest ordered by history score.
+    """
+    if first and first in board.empty:
+        yield first
+
+    captures = board.capture_moves(player)
+    threats = board.threat_moves(player)
+    stages = ([], [], [], [], [])
+    for cell in board.empty if cells is None else cells:
+        if cell != first:
+            stages[move_stage(board, player, cell, killers, captures, threats)].append(cell)
+
+    for stage in stages[:_QUIET]:
+        yield from stage
+
+    quiet = stages[_QUIET]
+    random.shuffle(quiet)
+    if history:
+        quiet.sort(key=lambda cell: history.get((player, cell), 0), reverse=True)
+    yield from quiet
+
+def move_stage(board, player, cell, killers=(), captures=None, threats=None):
+    """
+    Which stage of the move order a move belongs to. The player's capture
+    and threat cells can be passed in when classifying many moves.
+    """
+    occupied = board.occupied
+    if not any(nb in occupied for nb in board.neighbours[cell]):
+        # Cannot win, capture or threaten without neighbouring tokens
+        return _KILLER if cell in killers else _QUIET
+
+    if board.wins(player, cell):
+        return _WIN
+    if captures is None:
+        captures = board.capture_moves(player)
+        threats = board.threat_moves(player)
+    if cell in captures:
+        return _CAPTURE
+    if cell in threats:
+        return _THREAT
+    return _KILLER if cell in killers else _QUIET
+
+def candidate_moves(board, radius, base=None, played=()):
+    """
+    The empty cells worth searching on a large board: those within hex
+    distance radius of a token (which includes every winning, capturing
+    and capture threatening cell when radius >= 1), those between a token
+    and its nearby edge (edge templates), and the capture and capture
+    threat cells of both players. None (every cell) when the board has no
+    tokens.
+
+    Given base, the candidates of an earlier position, only the cells near
+    the tokens played since then are added to it.
+    """
+    if not board.occupied:
+        return None
+    area = area_table(board.n, radius)
+    templates = edge_template_table(board.n)
+    occupied = board.occupied
+    if base is None:
+        cells = set()
+        played = occupied
+    else:
+        cells = set(base)
+    for cell in played:
+        colour = occupied.get(cell)
+        if colour is not None:
+            cells.update(area[cell])
+            cells.update(templates[(cell, colour)])
+    for colour in (RED, BLUE):
+        cells |= board.capture_moves(colour)
+        cells |= board.threat_moves(colour)
+    cells &= board.empty
+    return cells or None
@@ -0,0 +1,157 @@
+"""
+Root-parallel search over a pool of worker processes
+"""
+
+import time
+import multiprocessing
+
+from pygame.board import Board
+from pygame.movegen import ordered_moves
+from pygame.strategy import age_heuristics, negamax, search_cells, SearchState, SearchTimeout
+from pygame.transposition import EXACT, TranspositionTable, table_entries, space_limit
+
+# Extra seconds to wait for workers past the deadline (they stop on their own)
+GRACE_TIME = 0.2
+
+# Search state of this process when it is a worker, see _init_worker()
+_worker = None
+
+class SearchPool:
+    """
+    Worker processes that each search a batch of the root moves, sharing
+    the best root value found so far as their alpha bound.
+    """
+
+    def __init__(self, workers, colour, oppo, pruning=None):
+        """
+        Start the worker processes (once, they are reused every turn).
+        """
+        self.workers = workers
+        self.colour = colour
+        self.alpha = multiprocessing.Value('d', float('-inf'))
+        # Number of the running search, under the lock of alpha: tasks of a
+        # search that timed out may still be running, and must neither
+        # raise alpha for the next one nor keep the workers busy
+        self.search_id = multiprocessing.Value('l', 0, lock=False)
+        self.pool = multiprocessing.Pool(
+            workers, _init_worker, (colour, oppo, self.alpha, self.search_id, pruning))
+
+    def search(self, board, player, depth, wall_deadline):
+        """
+        Search every root move to the given depth, returns the best move.
+        Raises SearchTimeout if the workers do not finish by the deadline
+        (time.monotonic()).
+        """
+        # Deal the moves out in order, so every batch gets some good ones
+        entry = player.tt.probe(board.hash)
+        cells = search_cells(board, player, root=True)
+        moves = list(ordered_moves(board, self.colour, entry[4] if entry else None, cells=cells))
+        batches = [moves[i::self.workers] for i in range(self.workers)]
+        tokens = list(board.occupied.items())
+        budget = wall_deadline - time.monotonic()
+        if budget <= 0:
+            raise SearchTimeout()
+
+        with self.alpha.get_lock():
+            self.search_id.value += 1
+            self.alpha.value = float('-inf')
+        search_id = self.search_id.value
+        pending = [self.pool.apply_async(_search_batch,
+                                         (search_id, board.n, tokens, batch, depth, budget))
+                   for batch in batches if batch]
+        results = []
+        try:
+            for result in pending:
+                found = result.get(max(0, wall_deadline - time.monotonic()) + GRACE_TIME)
+                if found is None:
+                    raise SearchTimeout()
+                results.extend(found)
+        except multiprocessing.TimeoutError:
+            raise SearchTimeout()
+
+        # Values that did not beat alpha are only bounds, prefer exact ones
+        coord, value, _ = max(results, key=lambda result: (result[1], result[2]))
+        player.tt.store(board.hash, depth, EXACT, value, coord)
+        return coord
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        self.pool.terminate()
+
+
+def start_pool(workers, colour, oppo, pruning=None):
+    """
+    Start a search pool, or return None if worker processes are not
+    available here (e.g. when we are running inside a daemon process).
+    """
+    if workers < 2:
+        return None
+    try:
+        return SearchPool(workers, colour, oppo, pruning)
+    except (OSError, ValueError, AssertionError, ImportError):
+        return None
+
+
+class _WorkerState(SearchState):
+    """
+    Search state of a worker process, with its own transposition table.
+    """
+
+    def __init__(self, colour, oppo, alpha, search_id, pruning):
+        super().__init__(colour, oppo, TranspositionTable(table_entries(space_limit())), pruning)
+        self.alpha = alpha              # best root value of all workers
+        self.search_id = search_id      # number of the search alpha is for
+        self.root_hash = None           # position the killers and history are for
+
+def _init_worker(colour, oppo, alpha, search_id, pruning):
+    """
+    Set up the search state of a worker process.
+    """
+    global _worker
+    _worker = _WorkerState(colour, oppo, alpha, search_id, pruning)
+
+def _search_batch(search_id, n, tokens, moves, depth, budget):
+    """
+    Search a batch of root moves in a worker, returns (move, value, exact)
+    for each of them, or None if the time budget (seconds) ran out or a
+    newer search started.
+    """
+    state = _worker
+    board = Board(n)
+    for (r, q), colour in tokens:
+        board.place_update(colour, r, q)
+
+    state.deadline = time.process_time() + budget
+    state.root_ply = len(board.undo_stack)
+    search_cells(board, state, root=True)     # the candidates below the root
+    # Batches of the same turn share their cutoff moves, those of earlier
+    # turns are aged as in the main process
+    if board.hash != state.root_hash:
+        age_heuristics(state)
+        state.root_hash = board.hash
+    state.tt.new_search()
+
+    results = []
+    beta = float('inf')
+    try:
+        for move in moves:
+            with state.alpha.get_lock():
+                if state.search_id.value != search_id:
+                    return None
+                alpha = state.alpha.value
+            board.make_move(state.colour, move)
+            value = -negamax(board, state, state.oppo, -beta, -alpha, depth - 1)
+            board.unmake_move()
+            results.append((move, value, value > alpha))
+
+            # Tighten the bound of every worker in this search
+            with state.alpha.get_lock():
+                if state.search_id.value != search_id:
+                    return None
+                if value > state.alpha.value:
+                    state.alpha.value = value
+    except SearchTimeout:
+        return None
+    return results
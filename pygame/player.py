@@ -1,9 +1,31 @@
+import os
 import time
+import weakref
 from referee.game import _ACTION_STEAL, _ACTION_PLACE
+try:
+    from referee.player import shared_process
+except ImportError:
+    # The course referee does not say: assume the worst, so as never to
+    # ponder on the opponent's clock
+    def shared_process():
+        """
+        True if the referee may run the players in this process.
+        """
+        return True
 from pygame.board import Board, RED, BLUE
 from pygame.strategy import make_action, random_first_move
+from pygame import mcts
+from pygame.transposition import TranspositionTable, table_entries, space_limit
+from pygame.parallel import start_pool
+from pygame.ponder import Ponderer
+from pygame.movegen import Pruning
 
 class Player:
+    search_workers = 0           # Worker processes for root-parallel search (0: search in this process)
+    engine = staticmethod(make_action)  # Strategy choosing our moves
+    ponder = False               # Keep searching in a background thread on the opponent's time (see PonderingPlayer)
+    pruning = Pruning(min_size=11, radius=2, root_radius=3)   # Moves searched on large boards (None: all)
+
     def __init__(self, player, n):
         """
         Called once at the beginning of a game to initialise this player.
@@ -17,53 +39,67 @@ class Player:
         self.board = Board(n)
         self.total_time = 0          # Keep track of time
         self.turn_time = 0
+        self.deadline = None         # Deadline of the running search (process time)
+        self.root_ply = 0            # Undo stack height at the root of the running search
+        self.candidates = None       # Moves searched below the root of the running search (large boards)
+        self.score = None            # Value of the last search completed
+        self.pv = []                 # Line of play the last search completed expects, our move first
+        self.killers = {}            # Killer moves by ply from the search root, kept between turns
+        self.history = {}            # History scores by (colour, move), kept between turns
+        self.tree = None             # Search tree kept between turns (MCTS)
+        self.tt = TranspositionTable(table_entries(space_limit()))   # Shared by the searches of every turn
         self.oppo = None
         if player == RED:
             self.oppo = BLUE
         else:
             self.oppo = RED
 
+        # Started once and reused on every turn, None if not available
+        self.pool = start_pool(self.search_workers, self.colour, self.oppo, self.pruning)
+        if self.pool is not None:
+            # The referee never says the game is over: stop the workers
+            # when the player goes away (or at exit)
+            weakref.finalize(self, self.pool.close)
+        # Only ponder if the opponent's clock would not pay for it
+        self.ponderer = Ponderer(self) if self.ponder and not shared_process() else None
+
     def action(self):
         """
         Called at the beginning of your turn. Based on the current state
         of the game, select an action to play.
         """
-        self.turn_time = time.time()
+        self.turn_time = time.process_time()
+        if self.ponderer is not None:
+            self.ponderer.stop()
         if self.board.is_first_move(self.colour):
             if self.colour == RED:
                 r, q = random_first_move(self.board, 0, self.board.n - 1)
                 return (_ACTION_PLACE, r, q)
             else:
                 return (_ACTION_STEAL,)         
-        act_r, act_q = make_action(self.board, self)
+        act_r, act_q = self.engine(self.board, self)
 
         # Prevent draws from happening (by keeping track of game configurations (in turn function))
         old = [(act_r, act_q)]
-        self.board.occupied[old[0]] = self.colour
-        captures = None
-        captures = self.board.valid_capture(self.colour, act_r, act_q)          
-        if captures:
-            self.board.capture_update(captures)
+        self.board.make_move(self.colour, (act_r, act_q))
 
         # Find another move if about to make a move that makes a configuration thats happened 6 times before
-        while self.board.same_count.get(frozenset(self.board.occupied.items())) == 6:
-            self.board.recover_board(self.colour, None, captures)
+        while self.board.repeats() == 6:
+            self.board.unmake_move()
 
+            # Block the moves already rejected while choosing another one
             for i in old:
-                self.board.occupied[i] = self.colour
+                self.board.place_update(self.colour, i[0], i[1])
             
-            act_r, act_q = make_action(self.board, self)
+            act_r, act_q = self.engine(self.board, self)
 
-            for i in old:
-                self.board.occupied.pop(i)
+            for i in reversed(old):
+                self.board.remove(i[0], i[1])
 
-            self.board.occupied[(act_r, act_q)] = self.colour
-            captures = self.board.valid_capture(self.colour, act_r, act_q)          
-            if captures:
-                self.board.capture_update(captures)
+            self.board.make_move(self.colour, (act_r, act_q))
             old.append((act_r, act_q))
 
-        self.board.recover_board(self.colour, (act_r, act_q), captures)
+        self.board.unmake_move()
         return (_ACTION_PLACE, act_r, act_q)
         
     def turn(self, player, action):
@@ -77,8 +113,12 @@ class Player:
         the same as what your player returned from the action method
         above. However, the referee has validated it at this point.
         """
+        # The board is about to change under the pondering thread
+        if self.ponderer is not None:
+            self.ponderer.stop()
+
         if player == self.colour:
-            self.total_time = self.total_time + (time.time() - self.turn_time )
+            self.total_time = self.total_time + (time.process_time() - self.turn_time )
 
         if action[0] == _ACTION_STEAL:
             self.board.steal_update()
@@ -90,7 +130,45 @@ class Player:
                 self.board.capture_update(captures)
 
         # Keeping track of game configurations
-        if frozenset(self.board.occupied.items()) in self.board.same_count:
-            self.board.same_count[frozenset(self.board.occupied.items())] = self.board.same_count[frozenset(self.board.occupied.items())] + 1
-        else:
-            self.board.same_count[frozenset(self.board.occupied.items())] = 1
\ No newline at end of file
+        self.board.record_position()
+
+        # Keep the part of the search tree that is still relevant
+        if self.tree is not None:
+            self.tree.advance(self.board, action, player)
+
+        # Think on the opponent's time
+        if self.ponderer is not None and player == self.colour and not self.board.end_game():
+            self.ponderer.start()
+
+
+class ParallelPlayer(Player):
+    """
+    Same agent, searching the root moves on every core.
+    """
+    search_workers = os.cpu_count() or 1
+
+
+class MCTSPlayer(Player):
+    """
+    Same agent, choosing moves by Monte Carlo Tree Search.
+    """
+    engine = staticmethod(mcts.make_action)
+
+
+class PonderingPlayer(Player):
+    """
+    Same agent, searching on the opponent's time as well. Only when it runs
+    in a process of its own: under this referee, which runs both players in
+    one process and times them by its CPU time, the background search
+    would be billed to the opponent (and take the opponent's CPU), so it
+    plays as Player.
+    """
+    ponder = True
+
+
+class PonderingMCTSPlayer(MCTSPlayer):
+    """
+    MCTS agent, growing its tree on the opponent's time as well (only in a
+    process of its own, see PonderingPlayer).
+    """
+    ponder = True
@@ -0,0 +1,109 @@
+"""
+Pondering: keep searching in a background thread on the opponent's time
+"""
+
+import threading
+from pygame.strategy import minimax, SearchState, SearchTimeout, _OPPO_TO_MOVE
+
+class Ponderer:
+    """
+    Background search between the end of our turn and the opponent's move.
+
+    In MCTS mode the thread keeps growing the player's tree, which the next
+    turn advances into. In minimax mode it plays the opponent reply the
+    transposition table predicts and searches our answer to it, filling the
+    shared table and leaving a result for iterative_deepening to start from
+    if the prediction was right.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self.thread = None
+        self.state = None
+        self.result = None      # (position hash, depth completed, best move)
+
+    def start(self):
+        """
+        Start pondering the current position (the opponent is to move).
+        """
+        self.stop()
+        self.result = None
+        player = self.player
+        board = _copy(player.board)
+        if player.tree is not None:
+            if player.tree.key != board.hash:
+                return
+            self.state = _ponder_state(player)
+            target = self._grow_tree
+        else:
+            entry = player.tt.probe(board.hash ^ _OPPO_TO_MOVE)
+            if not entry or not entry[4] or entry[4] not in board.empty:
+                return
+            board.make_move(player.oppo, entry[4])
+            if board.end_game():
+                return
+            self.state = _ponder_state(player)
+            target = self._search
+        self.thread = threading.Thread(target=target, args=(board, self.state), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop pondering and wait for the thread to finish.
+        """
+        if self.thread is None:
+            return
+        self.state.stopped = True
+        self.state.deadline = float('-inf')
+        self.thread.join()
+        self.thread = None
+
+    def take_result(self, board):
+        """
+        The best move found for this position while pondering, and the depth
+        searched, or (None, 0) if the prediction was wrong.
+        """
+        result, self.result = self.result, None
+        if result and result[0] == board.hash:
+            return result[2], result[1]
+        return None, 0
+
+    def _search(self, board, state):
+        """
+        Iterative deepening on our answer to the predicted reply.
+        """
+        try:
+            for depth in range(1, board.size - len(board.occupied) + 1):
+                coord = minimax(board, state, depth)
+                self.result = (board.hash, depth, coord)
+        except SearchTimeout:
+            pass
+
+    def _grow_tree(self, board, state):
+        """
+        Keep growing the MCTS tree from the current root.
+        """
+        tree = self.player.tree
+        while not state.stopped:
+            tree.iterate(board)
+
+
+def _ponder_state(player):
+    """
+    Search state of the thread, sharing the player's transposition table.
+    There is no deadline; setting it to -inf (or stopped, for MCTS) stops
+    the thread.
+    """
+    state = SearchState(player.colour, player.oppo, player.tt, player.pruning,
+                        deadline=float('inf'))
+    state.stopped = False
+    return state
+
+def _copy(board):
+    """
+    A board with the same tokens (and hash), for the thread to search on.
+    """
+    copy = type(board)(board.n)
+    for (r, q), colour in board.occupied.items():
+        copy.place_update(colour, r, q)
+    return copy
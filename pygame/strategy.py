@@ -2,31 +2,94 @@
 Functions that help the agent make decisions
 """
 
+import time
 import random
+try:
+    from referee.player import time_limit
+except ImportError:
+    # The course referee does not tell the players its limits
+    def time_limit():
+        """
+        The CPU time limit (seconds) of the referee: not known, taken as
+        none (the budget then grows with the board).
+        """
+        return 0
 from pygame.board import RED, BLUE
+from pygame.transposition import EXACT, LOWER, UPPER
+from pygame.movegen import ordered_moves, candidate_moves
+from pygame.evaluate import evaluate, greedy_scores, search_score, distance_fields
+from pygame.threats import find_threats
 from collections import defaultdict
 
+# Hash key mixed into positions where the opponent is to move
+_OPPO_TO_MOVE = 0x9E3779B97F4A7C15
+
+# Share of the time budget kept in reserve
+TIME_MARGIN = 0.1
+
+# Fewest moves we plan for when sharing out the time left
+MIN_MOVES_LEFT = 4
+
+# Time left (seconds) under which we only play greedy moves
+GREEDY_TIME_LEFT = 5
+
+# Killer moves remembered per ply
+KILLER_SLOTS = 2
+
+# Plies played between two of our searches (our move and the reply)
+TURN_PLIES = 2
+
+# History scores are divided by this at the start of each turn's search
+HISTORY_DECAY = 2
+
+# Plies of captures searched past the nominal depth
+QUIESCENCE_DEPTH = 4
+
+# Value of a won game, less the plies it takes to win it
+WIN_SCORE = 10 ** 6
+
+# Values beyond this are won (or lost) games, not evaluations
+WIN_BOUND = WIN_SCORE // 2
+
+# Half width of the aspiration window around the previous iteration's score
+ASPIRATION_WINDOW = 2
+
+class SearchTimeout(Exception):
+    """The deadline of the current search has passed."""
+
+class SearchState:
+    """
+    The attributes of a Player that the search functions use, for searches
+    run away from the player (in a worker process or a background thread).
+    """
+
+    def __init__(self, colour, oppo, tt, pruning, deadline=None):
+        self.colour = colour
+        self.oppo = oppo
+        self.tt = tt
+        self.pruning = pruning
+        self.pool = None
+        self.deadline = deadline
+        self.root_ply = 0
+        self.candidates = None
+        self.score = None
+        self.pv = []
+        self.killers = {}
+        self.history = {}
+
 def make_action(board, player):
     """
     Make decision for next move.
     """
     
     # Use greedy method when the time is close to the maximum 
-    if player.total_time > (board.n ** 2 - 5):
+    if time_budget(board) - player.total_time < GREEDY_TIME_LEFT:
         return greedy_proceed(board, player)
 
     # Evaluate the current state
-    value = eval(board, player.colour)
-    oppo_value = eval(board, player.oppo)
-
-    if board.n > 13:
-        # Use greedy method to save time at the start
-        if len(board.occupied) < board.n:
-            return greedy_proceed(board, player)
-
-        # When we have an advantage reduce cutoff depth for minimax 
-        if value > oppo_value:
-            return minimax(board, player, 1)
+    evaluation = evaluate(board)
+    value = evaluation[player.colour].score
+    oppo_value = evaluation[player.oppo].score
 
     # Low utility, aim for defense by capturing
     if value < oppo_value:
@@ -34,181 +97,127 @@ def make_action(board, player):
 
         if result:
             return result[0]
-        action = go_capture(board, player)
+        action = go_capture(board, player, evaluation)
         
         if action:
             return action
     
-    # Minimax cutoff depth depending on the board size and time constraint
-    if board.n <= 5:
-        return minimax(board, player, 3)
-    else:
-        
-        return minimax(board, player, 2)
+    # Search as deep as the time for this move allows
+    return iterative_deepening(board, player, move_deadline(board, player))
 
-def greedy_eval(board, player):
+def time_budget(board):
     """
-    Calculate critical tokens that contribute to the goal, in the range of 0-n.
+    CPU time (seconds) we may use over the whole game.
     """
-    if player == RED:
-        red_critical = count_criticals(board, RED)
-        return red_critical
-    else:
-        blue_critical = count_criticals(board, BLUE)
-        return blue_critical
+    return time_limit() or board.n ** 2
 
-def greedy_proceed(board, player):
+def move_deadline(board, player):
     """
-    Directly place to location where contributes to the winning.
+    Process time by which this move should be chosen: the time left in the
+    budget, shared evenly by the moves we still expect to play.
     """
-    actions = {}
-    tried = list(board.occupied)
-
-    while len(tried) != board.size:
-        coord = random_move(board.occupied, 0, board.n - 1)
-        if coord in tried:
-            continue
-        tried.append(coord)
-        board.occupied[coord] = player.colour
+    time_left = time_budget(board) * (1 - TIME_MARGIN) - player.total_time
+    moves_left = max(MIN_MOVES_LEFT, (board.size - len(board.occupied)) // 2)
+    return player.turn_time + max(0, time_left) / moves_left
 
-        # Evaluate the state
-        value = greedy_eval(board, player)
-        actions[coord] = value
+def iterative_deepening(board, player, deadline):
+    """
+    Search depth 1, 2, 3... until the deadline, returns the best move of
+    the deepest search completed.
+    """
+    # Cutoff moves of the previous turns still help ordering this search
+    age_heuristics(player)
+
+    # Depth 1 always completes, so that there is a move to return
+    coord = minimax(board, player, 1)
+    player.deadline = deadline
+    base = len(board.undo_stack)
+
+    # Carry on from the pondered search if the opponent played the reply we predicted
+    first_depth = 2
+    if player.ponderer is not None:
+        pondered, searched = player.ponderer.take_result(board)
+        if pondered:
+            coord, first_depth = pondered, max(first_depth, searched + 1)
+
+    # Workers search while we wait, so our own process time hardly moves:
+    # give them the same time, by the wall clock
+    wall_deadline = time.monotonic() + deadline - time.process_time()
+    try:
+        for depth in range(first_depth, board.size - len(board.occupied) + 1):
+            if player.pool:
+                coord = player.pool.search(board, player, depth, wall_deadline)
+            else:
+                coord = minimax(board, player, depth, player.score)
+    except SearchTimeout:
+        # Take back the moves of the unfinished search
+        while len(board.undo_stack) > base:
+            board.unmake_move()
+    finally:
+        player.deadline = None
 
-        # Recover the board state
-        board.occupied.pop(coord)
+    # If next move will reach the end of the game, make corresponding move
+    result = check_game_point(board, player)
+    if result:
+        return result[0]
+    return coord
 
-    action = max(actions, key=actions.get)
-    return action
+def greedy_proceed(board, player):
+    """
+    Directly place to location where contributes to the winning.
+    """
+    # Critical tokens after placing on each cell, scored all at once
+    scores = greedy_scores(board, player.colour)
+    best = scores.max()
+    return random.choice([cell for cell in board.empty if scores[cell] == best])
 
 def cutoff_test(board, depth):
     """
-    Set a depth for minimax exploration.
+    Stop minimax exploration when the board is full or out of depth.
     """
     if len(board.occupied) == board.size:
         return True
-    # Depth
-    if len(board.occupied) % depth == 0:
+    # Depth (remaining plies)
+    if depth <= 0:
         return True
     return False
 
-def eval(board, player):
-    """
-    Evaluate the current board state.
-    """
-    red_critical = blue_critical = 0
-
-    # Critical tokens that contribute to the goal, in the range of 0-n
-    red_critical = count_criticals(board, RED)
-    blue_critical = count_criticals(board, BLUE)
-
-    # Number of tokens from one player
-    red_tokens = board.count_player_tokens(RED)
-    blue_tokens = board.count_player_tokens(BLUE)
-    
-    red_value = red_critical + (red_tokens - blue_tokens)
-    blue_value = blue_critical + (blue_tokens - red_tokens)
-    
-    if player == RED:
-        return red_value 
-    else:
-        return blue_value
-
-def count_criticals(board, player):
-    """
-    Find the number of tokens/token groups that contribute to the goal.
-    """
-    # A token group is a bunch of tokens that are adjacent to each other.
-    groups = find_all_groups(board, player)
-    
-    # The number of distinguishable rows/columns the player has occupied, in the range of 0-n
-    critical_length = 0
-    group_crit = {}
-    for group in groups:
-        critical = []
-        for token in group:
-            # Find distinguishable rows and columns
-            if player == RED:
-                if token[0] not in critical:
-                    critical.append(token[0])
-            elif player == BLUE:
-                if token[1] not in critical:
-                    critical.append(token[1])
-
-        cur_length = len(critical)
-        group_crit[groups.index(group)] = cur_length
-        if cur_length > critical_length:
-            critical_length = cur_length
-    
-    # The number of groups that could be impactful
-    num_crit_group = 0
-
-    # Count groups that have all critical tokens
-    # Does not matter to the game (generally) if the length <= 2
-    if critical_length > 2:
-        for v in group_crit.values():
-            if v == critical_length:
-                num_crit_group += 1
-
-    return critical_length + num_crit_group
-
-def find_all_groups(board, player):
-    """
-    Find all token groups.
-    A token group is a bunch of tokens that are adjacent to each other.
-    """
-    groups = []
-    explored = []
-    for c, p in board.occupied.items():
-        if p == player and c not in explored:
-            group = []
-            find_group_tokens(board, c, player, group, explored)
-            groups.append(group)
-    return groups
-
-def find_group_tokens(board, start, player, group, explored):
-    """
-    Find each adjacent tokens starting from one token.
-    """
-    group.append(start)
-    explored.append(start)
-    
-    nbs = board.find_neighbours(start, player)
-    for nb in nbs:
-        if (nb not in explored) and (nb not in group):
-            find_group_tokens(board, nb, player, group, explored)
-
-def go_capture(board, player):
+def go_capture(board, player, evaluation=None):
     """
     Try to capture opponent.
     """  
     oppo = player.oppo
 
+    # Capture straight away if we can, taking the most tokens
+    capture_moves = board.capture_moves(player.colour)
+    if capture_moves:
+        return max(sorted(capture_moves),
+                   key=lambda c: len(board.valid_capture(player.colour, c[0], c[1])))
+
     # Search for opponent's tokens
-    oppo_tokens = board.find_same_tokens(oppo)
+    if evaluation is None:
+        evaluation = evaluate(board, connection=False)
+    oppo_tokens = evaluation[oppo].tokens
     choices = defaultdict(int)
 
+    # Only a move that sets up a capture can make one possible next move:
+    # find the captures each of those would set up, if it is safe to play
+    follow_ups = {}
+    for nb in sorted(board.threat_moves(player.colour)):
+        board.place_update(player.colour, nb[0], nb[1])
+        if not board.capture_danger(player.oppo, nb[0], nb[1]):
+            follow_ups[nb] = set(board.capture_moves(player.colour))
+        board.remove(nb[0], nb[1])
+
     for t in oppo_tokens:
         # For each opponent, find empty adjacent hexes
         emp_nbs = board.find_empty_neighbours(t)
         for nb in emp_nbs:
-            # Try if it can perform capture directly
-            board.occupied[nb] = player.colour
-            if board.valid_capture(player.colour, nb[0], nb[1]):
-                board.occupied.pop(nb)
-                return nb
-
-            # If the trial above fails and if this is not a dangerous place, 
-            # think about doing it in next move
-            if not board.capture_danger(player.oppo, nb[0], nb[1]):
-                res_emp_nbs = emp_nbs
-                # Make sure not to consider nb
-                res_emp_nbs.remove(nb)
-                for i in res_emp_nbs:
-                    captures = board.valid_capture(player.colour, i[0], i[1])
-                    if captures:
+            # Think about capturing from one of the other empty hexes in next move
+            if nb in follow_ups:
+                for i in emp_nbs:
+                    if i in follow_ups[nb]:
                         choices[nb] += 1
-            board.occupied.pop(nb)
 
     # Choose the move that captures the most opponents
     if choices:
@@ -217,148 +226,289 @@ def go_capture(board, player):
     else:
         return None
 
-def minimax(board, player, depth):
-    actions = {}
-    alpha = float('-inf')
-    beta = float('inf')
-
-    # Try each location that is empty
-    tried = list(board.occupied)
-    while len(tried) != board.size:
-        r, q = random_move(tried, 0, board.n - 1)
-        tried.append((r, q))
-        
-        # Start of each branching sub-state is the same as the board state
-        if not board.is_occupied(r, q):    
-            # Update current sub-state   
-            board.occupied[(r, q)] = player.colour
-            captures = board.valid_capture(player.colour, r, q)
-            if captures:
-                board.capture_update(captures)
-
-            value = get_min_value(board, player, alpha, beta, depth)
-            actions[(r, q)] = value
-
-            # Return to original state
-            board.recover_board(player.colour, (r, q), captures)
-        
-    # If next move will reach the end of the game, make corresponding move
-    result = check_game_point(board, player)
-    if result:
-        actions[result[0]] = result[1]
-
-    coord = max(actions, key=actions.get)
+def minimax(board, player, depth, guess=None):
+    """
+    Principal variation search of the given number of plies, returns the
+    best move. Given a guess of the value (e.g. the score of the previous
+    iteration), the search first looks only inside an aspiration window
+    around it, and searches again with the full window if the value falls
+    outside. Leaves the value in player.score and the expected line of
+    play in player.pv.
+    """
+    inf = float('inf')
+    coord = value = None
+    if guess is not None and abs(guess) < WIN_SCORE - board.size:
+        a, b = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+        coord, value = search_root(board, player, depth, a, b)
+        if not a < value < b:
+            coord = None
+    if coord is None:
+        coord, value = search_root(board, player, depth, -inf, inf)
+    player.score = value
+    player.pv = principal_variation(board, player, depth)
     return coord
 
-def get_max_value(board, player, a, b, depth):
+def search_root(board, player, depth, a, b):
+    """
+    Search the root moves within the window (a, b), returns the best move
+    and its value. The value is a bound if it is a or b.
+    """
+    player.tt.new_search()
+    player.root_ply = len(board.undo_stack)
+    a_orig = a
+    coord = None
+
+    # Try each location that is empty, best move of an earlier search first
+    entry = player.tt.probe(board.hash)
+    cells = search_cells(board, player, root=True)
+    if depth == 1:
+        distance_fields(board, player.colour)
+    for r, q in ordered_moves(board, player.colour, entry[4] if entry else None, cells=cells):
+        board.make_move(player.colour, (r, q))
+        value = principal_value(board, player, player.oppo, a, b, depth - 1, coord is None)
+        board.unmake_move()
+
+        if coord is None or value > a:
+            coord = (r, q)
+        if value > a:
+            a = value
+        if a >= b:
+            return coord, b
+
+    if a > a_orig:
+        player.tt.store(board.hash, depth, EXACT, a, coord)
+    return coord, a
+
+def principal_value(board, player, colour, a, b, depth, first):
+    """
+    Value of the position just reached, for the side that moved into it
+    (`colour` is to move next). Only the first move of a node is searched
+    with the full window. The others are expected to be worse, which a
+    null window at a proves cheaply; they are searched again in full only
+    if they turn out better.
+    """
+    if first:
+        return -negamax(board, player, colour, -b, -a, depth)
+    value = -negamax(board, player, colour, -a - 1, -a, depth)
+    if a < value < b:
+        value = -negamax(board, player, colour, -b, -a, depth)
+    return value
+
+def negamax(board, player, colour, a, b, depth):
+    """
+    Principal variation search of a position with `colour` to move. The
+    value is from the view of `colour`, clamped to [a, b].
+    """
+    score = terminal_score(board, player, colour)
+    if score is not None:
+        return score
     if cutoff_test(board, depth):
-        return eval(board, player.colour)
-
-    tried = list(board.occupied)
-    while len(tried) != board.size:
-        r, q = random_move(tried, 0, board.n - 1)
-        tried.append((r, q))
-            
-        if not board.is_occupied(r, q):
-            board.occupied[(r, q)] = player.colour
-            captures = board.valid_capture(player.colour, r, q)
-            if captures:
-                board.capture_update(captures)
-
-            a = max(a, get_min_value(board, player, a, b, depth))
-            
-            # Return to original state
-            board.recover_board(player.colour, (r, q), captures)
-
+        return quiescence(board, player, colour, a, b)
+    check_deadline(player)
+
+    # Reuse the result of an earlier search of this position, keeping the
+    # positions with the opponent to move apart from ours in the table
+    key = board.hash if colour == player.colour else board.hash ^ _OPPO_TO_MOVE
+    ply = len(board.undo_stack) - player.root_ply
+    entry = player.tt.probe(key)
+    first = None
+    if entry:
+        _, tt_depth, flag, value, first, _ = entry
+        value = value_from_table(value, ply)
+        if tt_depth >= depth:
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                a = max(a, value)
+            else:
+                b = min(b, value)
             if a >= b:
-                return b
+                return value
+
+    other = BLUE if colour == RED else RED
+    a_orig = a
+    best = None
+    killers = player.killers.get(ply, ())
+    if depth == 1:
+        # The leaves below: let make_move() tell their distances
+        distance_fields(board, player.colour)
+    cells = search_cells(board, player)
+    for i, (r, q) in enumerate(ordered_moves(board, colour, first, killers, player.history, cells)):
+        board.make_move(colour, (r, q))
+        value = principal_value(board, player, other, a, b, depth - 1, i == 0)
+
+        # Return to original state
+        board.unmake_move()
+
+        if value > a:
+            a = value
+            best = (r, q)
+        if a >= b:
+            player.tt.store(key, depth, LOWER, value_to_table(b, ply), best)
+            record_cutoff(player, colour, best, ply, depth)
+            return b
+    player.tt.store(key, depth, EXACT if a > a_orig else UPPER, value_to_table(a, ply), best)
     return a
 
-def get_min_value(board, player, a, b, depth):
-    if cutoff_test(board, depth):
-        return eval(board, player.colour)
-
-    tried = list(board.occupied)
-    while len(tried) != board.size:
-        r, q = random_move(tried, 0, board.n - 1)
-        tried.append((r, q))
-            
-        if not board.is_occupied(r, q):
-            board.occupied[(r, q)] = player.oppo
-            captures = board.valid_capture(player.oppo, r, q)
-            if captures:
-                board.capture_update(captures)
-            
-            b = min(b, get_max_value(board, player, a, b, depth))
-            
-            # Return to original state
-            board.recover_board(player.oppo, (r, q), captures)
-            
-            if b <= a:
-                return a
-    return b
+def value_to_table(value, ply):
+    """
+    The value of a node `ply` plies below the root as stored in the
+    transposition table. The plies to a won game are counted from the node
+    rather than the root, since the table outlives the search (and is
+    shared with searches from other roots).
+    """
+    if value >= WIN_BOUND:
+        return value + ply
+    if value <= -WIN_BOUND:
+        return value - ply
+    return value
+
+def value_from_table(value, ply):
+    """
+    The value stored in the transposition table for a node `ply` plies
+    below the root, as the search counts it (see value_to_table()).
+    """
+    if value >= WIN_BOUND:
+        return value - ply
+    if value <= -WIN_BOUND:
+        return value + ply
+    return value
+
+def terminal_score(board, player, colour):
+    """
+    Value of a finished game for `colour` to move, None if nobody has won
+    yet. Quicker wins (and slower losses) score better.
+    """
+    winner = board.end_game()
+    if winner is None:
+        return None
+    score = WIN_SCORE - (len(board.undo_stack) - player.root_ply)
+    return score if winner == colour else -score
+
+def quiescence(board, player, colour, a, b, depth=QUIESCENCE_DEPTH):
+    """
+    Search only captures past the nominal depth, so that positions are not
+    evaluated in the middle of an exchange. The side to move may also stand
+    pat, i.e. keep the evaluation of the position as it is.
+    """
+    score = terminal_score(board, player, colour)
+    if score is not None:
+        return score
+    stand_pat = search_score(board, player.colour)
+    if colour != player.colour:
+        stand_pat = -stand_pat
+    if stand_pat >= b:
+        return b
+    if depth <= 0 or len(board.occupied) == board.size:
+        return stand_pat
+    captures = board.capture_moves(colour)
+    if not captures:
+        return stand_pat
+    check_deadline(player)
+
+    a = max(a, stand_pat)
+    other = BLUE if colour == RED else RED
+    # The capture index changes as we go, take a copy
+    for move in sorted(captures):
+        board.make_move(colour, move)
+        value = -quiescence(board, player, other, -b, -a, depth - 1)
+        board.unmake_move()
+        if value > a:
+            a = value
+        if a >= b:
+            return b
+    return a
+
+def principal_variation(board, player, depth):
+    """
+    The line of play the last search expects: the best move stored for
+    each position along it.
+    """
+    pv = []
+    colour = player.colour
+    while len(pv) < depth:
+        key = board.hash if colour == player.colour else board.hash ^ _OPPO_TO_MOVE
+        entry = player.tt.probe(key)
+        if not entry or not entry[4] or entry[4] not in board.empty:
+            break
+        pv.append(entry[4])
+        board.make_move(colour, entry[4])
+        if board.end_game():
+            break
+        colour = BLUE if colour == RED else RED
+    for _ in pv:
+        board.unmake_move()
+    return pv
+
+def search_cells(board, player, root=False):
+    """
+    The moves to search on this board, None for every empty cell. At the
+    root, also work out the candidates the rest of the search builds on.
+    """
+    pruning = player.pruning
+    if pruning is None or board.n < pruning.min_size:
+        return None
+    if root:
+        player.candidates = candidate_moves(board, pruning.radius)
+        return candidate_moves(board, pruning.root_radius)
+    if player.candidates is None:
+        return candidate_moves(board, pruning.radius)
+    played = [move[0] for move in board.undo_stack[player.root_ply:]]
+    return candidate_moves(board, pruning.radius, player.candidates, played)
+
+def check_deadline(player):
+    """
+    Abandon the search once the deadline has passed.
+    """
+    if player.deadline is not None and time.process_time() > player.deadline:
+        raise SearchTimeout()
+
+def age_heuristics(player, plies=TURN_PLIES):
+    """
+    Carry the killer moves and history scores of earlier searches over to a
+    new one, the given number of plies later: killers move up to the ply
+    they are now at, and history scores fade so that recent cutoffs count
+    more.
+    """
+    killers = player.killers
+    for ply in sorted(killers):
+        moves = killers.pop(ply)
+        if ply >= plies:
+            killers[ply - plies] = moves
+
+    history = player.history
+    for key in list(history):
+        history[key] //= HISTORY_DECAY
+        if not history[key]:
+            del history[key]
+
+def record_cutoff(player, colour, move, ply, depth):
+    """
+    Remember a move that caused a cutoff, to try it early in other nodes:
+    as a killer move of the same ply, and in the history table.
+    """
+    killers = player.killers.setdefault(ply, [])
+    if move not in killers:
+        killers.insert(0, move)
+        del killers[KILLER_SLOTS:]
+    player.history[(colour, move)] = player.history.get((colour, move), 0) + depth * depth
 
 def check_game_point(board, player):
     """
-    Check if next move ends the game.
-    """
-    for r in range(board.n):
-        for q in range(board.n):
-            if not board.is_occupied(r, q):                
-                # Check if we win the game
-                board.occupied[(r, q)] = player.colour
-                winner = board.end_game()
-                if winner == player.colour:
-                    board.occupied.pop((r, q))
-                    return (r, q), float('inf')
-
-                # If opponent wins the game, attempt to save our life
-                board.occupied[(r, q)] = player.oppo
-                winner = board.end_game()
-                if winner == player.oppo:
-                    coord, value = attempt_save_life(board, player, (r, q))
-                    board.occupied.pop((r, q))
-                    if coord:
-                        return coord, value
-                    return 0
-
-                board.occupied.pop((r, q))
+    Check if next move ends the game: returns a winning move, or else a
+    move that stops the opponent from winning next, with value inf.
+    Returns 0 if there is neither.
+    """
+    threats = find_threats(board, player.colour)
+    if threats.wins:
+        return min(threats.wins), float('inf')
+
+    # Blocking by capture first, it takes tokens as well
+    if threats.blocks:
+        captures = [cell for cell in threats.blocks if cell not in threats.losses]
+        return min(captures or threats.blocks), float('inf')
     return 0
 
-def attempt_save_life(board, player, game_point):
-    # Return to original state
-    board.occupied.pop(game_point)
-
-    # Attemp by using capture
-    for r in range(board.n):
-        for q in range(board.n):
-            if not board.is_occupied(r, q) and game_point != (r, q):           
-                board.occupied[(r, q)] = player.colour
-                captures = board.valid_capture(player.colour, r, q)
-                if captures:
-                    board.capture_update(captures)
-                    # Put the game point back and check again
-                    board.occupied[game_point] = player.oppo
-                    if not board.end_game():
-                        board.recover_board(player.colour, (r, q), captures)
-                        return (r, q), float('inf')
-
-                board.recover_board(player.colour, (r, q), captures)
-
-    # Attemp by placing on the game point
-    board.occupied[game_point] = player.colour
-    if not board.end_game():
-        return game_point, float('inf')
-    return None, None
-
-def random_move(occupied, low, high):
-    r = int(random.randint(low, high))
-    q = int(random.randint(low, high))
-    while (r, q) in occupied:
-        r = int(random.randint(low, high))
-        q = int(random.randint(low, high))
-    return r, q
-
 def random_first_move(board, low, high):
     r = int(random.randint(low, high))
     q = int(random.randint(low, high))
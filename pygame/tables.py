@@ -0,0 +1,156 @@
+"""
+Lookup tables of board geometry (neighbours, capture diamonds, capture
+influence, nearby areas and edge templates of each cell) and position
+hashing keys, computed once per board size n. The agent keeps its own
+copy of the referee's tables (referee.tables), which the course referee
+does not have.
+"""
+
+import random
+
+from functools import lru_cache
+
+# Neighbour hex steps in clockwise order
+HEX_STEPS = [(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)]
+
+# Diamond capture patterns - each capture pattern is a list of offset steps:
+# [opposite offset, neighbour 1 offset, neighbour 2 offset]
+#
+# Note that the "opposite cell" offset is actually the sum of
+# the two neighbouring cell offsets (for a given diamond formation)
+#
+# Formed diamond patterns are either "longways", in which case the
+# neighbours are adjacent to each other (roll 1), OR "sideways", in
+# which case the neighbours are spaced apart (roll 2). This means
+# for a given cell, it is part of 6 + 6 possible diamonds.
+CAPTURE_PATTERNS = [
+    [(r1 + r2, q1 + q2), (r1, q1), (r2, q2)]
+    for roll in (1, 2)
+    for (r1, q1), (r2, q2) in zip(HEX_STEPS, HEX_STEPS[-roll:] + HEX_STEPS[:-roll])
+]
+
+
+@lru_cache(maxsize=None)
+def neighbour_table(n):
+    """
+    Map each cell (r, q) of an n * n board to a tuple of its in-bounds
+    neighbouring cells.
+    """
+    table = {}
+    for r in range(n):
+        for q in range(n):
+            table[(r, q)] = tuple(
+                (r + dr, q + dq) for dr, dq in HEX_STEPS
+                if 0 <= r + dr < n and 0 <= q + dq < n
+            )
+    return table
+
+
+@lru_cache(maxsize=None)
+def capture_table(n):
+    """
+    Map each cell (r, q) of an n * n board to a tuple of the capture
+    diamonds it is part of, keeping only the diamonds that lie entirely
+    inside the board. Each diamond is (opposite, neighbour 1, neighbour 2),
+    so placing a token on (r, q) captures both neighbours when the opposite
+    cell holds the same colour and both neighbours hold the other colour.
+    """
+    inside = lambda r, q: 0 <= r < n and 0 <= q < n
+    table = {}
+    for r in range(n):
+        for q in range(n):
+            diamonds = []
+            for pattern in CAPTURE_PATTERNS:
+                coords = tuple((r + dr, q + dq) for dr, dq in pattern)
+                if all(inside(*c) for c in coords):
+                    diamonds.append(coords)
+            table[(r, q)] = tuple(diamonds)
+    return table
+
+
+@lru_cache(maxsize=None)
+def influence_table(n):
+    """
+    Map each cell (r, q) of an n * n board to a tuple of the cells whose
+    capture diamonds include it, and the cell itself. These are the cells
+    where what placing a token captures (or threatens to) can change when
+    a token is placed on or removed from (r, q).
+    """
+    influence = {cell: {cell} for cell in capture_table(n)}
+    for cell, diamonds in capture_table(n).items():
+        for diamond in diamonds:
+            for c in diamond:
+                influence[c].add(cell)
+    return {cell: tuple(sorted(cells)) for cell, cells in influence.items()}
+
+
+@lru_cache(maxsize=None)
+def area_table(n, radius):
+    """
+    Map each cell (r, q) of an n * n board to a tuple of the cells within
+    the given hex distance of it (itself included).
+    """
+    table = {}
+    for r in range(n):
+        for q in range(n):
+            table[(r, q)] = tuple(
+                (r + dr, q + dq)
+                for dr in range(-radius, radius + 1)
+                for dq in range(-radius, radius + 1)
+                if abs(dr) + abs(dq) + abs(dr + dq) <= 2 * radius
+                and 0 <= r + dr < n and 0 <= q + dq < n
+            )
+    return table
+
+
+@lru_cache(maxsize=None)
+def edge_template_table(n, lines=3):
+    """
+    Map each cell (r, q) of an n * n board and player colour to a tuple of
+    the cells between it and the player's nearest edge (rows for "red",
+    columns for "blue") that a shortest connection to that edge may use,
+    for cells within the given number of lines of the edge. Empty for the
+    other cells.
+    """
+    # Line of a cell, and the two hex steps towards each edge of a player
+    towards = {
+        "red": (lambda r, q: r, ((-1, 0), (-1, 1)), ((1, 0), (1, -1))),
+        "blue": (lambda r, q: q, ((0, -1), (1, -1)), ((0, 1), (-1, 1))),
+    }
+    table = {}
+    for r in range(n):
+        for q in range(n):
+            for player, (line_of, to_start, to_end) in towards.items():
+                line = line_of(r, q)
+                cells = []
+                for distance, (a, b) in ((line, to_start), (n - 1 - line, to_end)):
+                    if distance > lines:
+                        continue
+                    # Every mix of the two steps, over the lines up to the edge
+                    for k in range(1, distance + 1):
+                        for j in range(k + 1):
+                            cells.append((r + (k - j) * a[0] + j * b[0],
+                                          q + (k - j) * a[1] + j * b[1]))
+                table[((r, q), player)] = tuple(
+                    c for c in cells if 0 <= c[0] < n and 0 <= c[1] < n)
+    return table
+
+
+@lru_cache(maxsize=None)
+def zobrist_table(n):
+    """
+    Map each cell (r, q) of an n * n board to random 64-bit keys, one per
+    player colour ("red", "blue"). The hash of a position is the XOR of the
+    keys of all its tokens, so placing or removing a token updates it with
+    a single XOR. Keys are seeded by n, so every board of the same size
+    (and every process) agrees on them.
+    """
+    rng = random.Random(n)
+    table = {}
+    for r in range(n):
+        for q in range(n):
+            table[(r, q)] = {
+                "red": rng.getrandbits(64),
+                "blue": rng.getrandbits(64),
+            }
+    return table
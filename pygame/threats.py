@@ -0,0 +1,73 @@
+"""
+Threat detection: cells that win the game in one move, and the moves that
+stop the opponent from playing one
+"""
+
+from collections import namedtuple
+from pygame.board import RED, BLUE
+
+# Immediate threats of a position, for the player to move:
+#   wins     cells where the player connects its edges
+#   losses   cells where the opponent connects its edges
+#   blocks   moves after which the opponent has no winning cell (empty if
+#            there is nothing to block, no way to block it, or no need as
+#            the player wins first)
+Threats = namedtuple("Threats", "wins losses blocks")
+
+def winning_cells(board):
+    """
+    Empty cells where each player would connect its edges, as a set by
+    colour. A cell wins if it is next to (or on the line of) both a group
+    covering the first line and one covering the last; both colours are
+    found in one pass over the tokens.
+    """
+    n = board.n
+    find = board.find
+    span = board.span
+    last = 1 << (n - 1)
+    near = {RED: (set(), set()), BLUE: (set(), set())}
+    for i in range(n):
+        near[RED][0].add((0, i))
+        near[RED][1].add((n - 1, i))
+        near[BLUE][0].add((i, 0))
+        near[BLUE][1].add((i, n - 1))
+
+    occupied = board.occupied
+    neighbours = board.neighbours
+    for (r, q), player in occupied.items():
+        lines = span[find(r * n + q)]
+        if lines & 1:
+            near[player][0].update(neighbours[(r, q)])
+        if lines & last:
+            near[player][1].update(neighbours[(r, q)])
+
+    empty = board.empty
+    return {player: near_start & near_end & empty
+            for player, (near_start, near_end) in near.items()}
+
+def find_threats(board, player):
+    """
+    Immediate threats for the player to move. Blocks are looked for among
+    the opponent's winning cells and the moves that capture, each tried
+    with make/unmake.
+    """
+    other = BLUE if player == RED else RED
+    cells = winning_cells(board)
+    wins, losses = cells[player], cells[other]
+    blocks = set()
+    if losses and not wins:
+        # Taking a winning cell blocks only that one. Captures may block
+        # more, if they take tokens of the opponent's groups on its edges
+        candidates = set(losses) if len(losses) == 1 else set()
+        n = board.n
+        for r, q in board.capture_moves(player):
+            for cr, cq in board.valid_capture(player, r, q):
+                if board.span[board.find(cr * n + cq)] & board.ends:
+                    candidates.add((r, q))
+                    break
+        for cell in candidates:
+            board.make_move(player, cell)
+            if not winning_cells(board)[other]:
+                blocks.add(cell)
+            board.unmake_move()
+    return Threats(wins, losses, blocks)
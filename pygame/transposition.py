@@ -0,0 +1,90 @@
+"""
+Transposition table for the minimax search
+"""
+
+try:
+    from referee.player import space_limit
+except ImportError:
+    # The course referee does not tell the players its limits
+    def space_limit():
+        """
+        The memory limit (MB) of the referee: not known, taken as none.
+        """
+        return 0
+
+# Bound types of a stored value
+EXACT = 0
+LOWER = 1       # value is a lower bound (search failed high)
+UPPER = 2       # value is an upper bound (search failed low)
+
+# Rough memory used by one stored entry (tuple, key and value objects), in bytes
+ENTRY_BYTES = 200
+
+# Share of the referee's space limit the table may use
+SPACE_SHARE = 0.25
+
+# Table size when the referee sets no space limit
+DEFAULT_ENTRIES = 2 ** 17
+
+class TranspositionTable:
+    """
+    Fixed size table of searched positions, keyed by position hash.
+
+    Each bucket has two slots: a depth-preferred slot that keeps the entry
+    searched deepest (or stored by the current search), and an always-replace
+    slot that takes everything else. An entry is (key, depth, flag, value,
+    move, generation).
+    """
+
+    def __init__(self, entries=DEFAULT_ENTRIES):
+        """
+        Initialize table holding at most the given number of entries.
+        """
+        self.buckets = max(1, entries // 2)
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+        self.generation = 0
+
+    def new_search(self):
+        """
+        Mark entries stored so far as old, so that new ones can replace them.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Returns the entry stored for a position hash, or None.
+        """
+        i = key % self.buckets
+        entry = self.deep[i]
+        if entry is not None and entry[0] == key:
+            return entry
+        entry = self.recent[i]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        """
+        Store the search result of a position.
+        """
+        i = key % self.buckets
+        entry = (key, depth, flag, value, move, self.generation)
+        old = self.deep[i]
+        if old is None or old[0] == key or depth >= old[1] or \
+                old[5] != self.generation:
+            # Keep the replaced entry around in the other slot
+            if old is not None and old[0] != key:
+                self.recent[i] = old
+            self.deep[i] = entry
+        else:
+            self.recent[i] = entry
+
+
+def table_entries(space_limit):
+    """
+    Number of entries that fit in our share of the space limit (MB).
+    """
+    if not space_limit:
+        return DEFAULT_ENTRIES
+    return max(1024, int(space_limit * SPACE_SHARE * 2 ** 20 / ENTRY_BYTES))
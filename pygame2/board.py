@@ -3,7 +3,7 @@ Board representation
 """
 
 from referee.game import COLOURS
-import copy
+from referee.tables import neighbour_table, capture_table
 from collections import defaultdict
 
 RED = COLOURS[0]
@@ -18,7 +18,9 @@ class Board:
         self.n = n
         self.occupied = {}  # store tokens on the board
         self.size = n ** 2
-
+        self.neighbours = neighbour_table(n)        # in-bounds neighbours of each cell
+        self.capture_patterns = capture_table(n)    # in-bounds capture diamonds of each cell
+        self.undo_stack = []    # (coord, player, captures) of each move made
 
     def inbounds(self, coord):
         r, q = coord
@@ -50,72 +52,37 @@ class Board:
             self.remove(i[0], i[1])
 
 
-    def valid_capture(self, player, r, q):
-        """ check if a CAPTURE action can happen """
-        captures = set()
-        # top
-        if self.valid_capture_diamond(player, (r+2, q-1), (r+1, q-1), (r+1, q)):
-            captures.add((r+1, q-1))
-            captures.add((r+1, q))
-        # top right close
-        if self.valid_capture_diamond(player, (r+1, q), (r+1, q-1), (r, q+1)):
-            captures.add((r+1, q-1))
-            captures.add((r, q+1))
-        # top right far
-        if self.valid_capture_diamond(player, (r+1, q+1), (r+1, q), (r, q+1)):
-            captures.add((r+1, q))
-            captures.add((r, q+1))
-        # right
-        if self.valid_capture_diamond(player, (r, q+1), (r+1, q), (r-1, q+1)):
-            captures.add((r+1, q))
-            captures.add((r-1, q+1))
-        # bottom right far
-        if self.valid_capture_diamond(player, (r-1, q+2), (r, q+1), (r-1, q+1)):
-            captures.add((r, q+1))
-            captures.add((r-1, q+1))
-        # bottom right close
-        if self.valid_capture_diamond(player, (r-1, q+1), (r-1, q), (r, q+1)):
-            captures.add((r-1, q))
-            captures.add((r, q+1))
-        # bottom
-        if self.valid_capture_diamond(player, (r-2, q+1), (r-1, q), (r-1, q+1)):
-            captures.add((r-1, q))
-            captures.add((r-1, q+1))
-        # bottom left far
-        if self.valid_capture_diamond(player, (r-1, q-1), (r, q-1), (r-1, q)):
-            captures.add((r, q-1))
-            captures.add((r-1, q))
-        # bottom left close
-        if self.valid_capture_diamond(player, (r-1, q), (r, q-1), (r-1, q+1)):
-            captures.add((r, q-1))
-            captures.add((r-1, q+1))
-        # left
-        if self.valid_capture_diamond(player, (r, q-1), (r-1, q), (r+1, q-1)):
-            captures.add((r-1, q))
-            captures.add((r+1, q-1))
-        # top left far
-        if self.valid_capture_diamond(player, (r+1, q-2), (r, q-1), (r+1, q-1)):
-            captures.add((r, q-1))
-            captures.add((r+1, q-1))
-        # top left close
-        if self.valid_capture_diamond(player, (r+1, q-1), (r, q-1), (r+1, q)):
-            captures.add((r, q-1))
-            captures.add((r+1, q))
-
+    def make_move(self, player, coord):
+        """ place a token and apply captures, remember them to undo the move """
+        r, q = coord
+        self.place_update(player, r, q)
+        captures = self.valid_capture(player, r, q)
+        self.capture_update(captures)
+        self.undo_stack.append((coord, player, captures))
         return captures
 
 
+    def unmake_move(self):
+        """ take back the latest move made by make_move """
+        coord, player, captures = self.undo_stack.pop()
+        other = BLUE if player == RED else RED
+        for c in captures:
+            self.occupied[c] = other
+        self.remove(coord[0], coord[1])
+        return coord
 
-    def valid_capture_diamond(self, player, diag, left, right):
-        """ check if a valid capture diamond is formed """
-        if (not self.inbounds(diag)) or (not self.inbounds(left)) or (not self.inbounds(right)):
-            return False
 
-        if (diag in self.occupied) and (left in self.occupied) and (right in self.occupied):
-            if self.occupied[diag] == player and self.occupied[left] != player and \
-                                                self.occupied[right] != player:
-                return True
-        return False
+    def valid_capture(self, player, r, q):
+        """ check if a CAPTURE action can happen """
+        captures = set()
+        occupied = self.occupied
+        # only the in-bounds diamonds around (r, q) are in the table
+        for diag, left, right in self.capture_patterns[(r, q)]:
+            if occupied.get(diag) == player and left in occupied and right in occupied:
+                if occupied[left] != player and occupied[right] != player:
+                    captures.add(left)
+                    captures.add(right)
+        return captures
 
 
     def is_occupied(self, r, q):        
@@ -171,34 +138,15 @@ class Board:
     
     def find_neighbours(self, coord, player=None):
         """ find all neighbouring same tokens or coordinates """
-        (r, q) = coord
-        nb_1 = (r + 1, q - 1)       # Top left
-        nb_2 = (r,     q - 1)       # Left
-        nb_3 = (r - 1, q)           # Bottom left
-        nb_4 = (r + 1, q)           # Top right
-        nb_5 = (r,     q + 1)       # Right
-        nb_6 = (r - 1, q + 1)       # Bottom right
-        neighbours = [nb_1, nb_2, nb_3, nb_4, nb_5, nb_6]
-        valid_nbs = list(filter(lambda nb: self.inbounds(nb), neighbours))
         if player:
-            player_nbs = list(filter(lambda nb: nb in self.occupied and self.occupied[nb] == player, valid_nbs))
-            return player_nbs
-        else:
-            return valid_nbs
+            occupied = self.occupied
+            return [nb for nb in self.neighbours[coord] if occupied.get(nb) == player]
+        return list(self.neighbours[coord])
 
     def find_empty_neighbours(self, coord):
         """ find all neighbouring empty coordinates """
-        (r, q) = coord
-        nb_1 = (r + 1, q - 1)       # Top left
-        nb_2 = (r,     q - 1)       # Left
-        nb_3 = (r - 1, q)           # Bottom left
-        nb_4 = (r + 1, q)           # Top right
-        nb_5 = (r,     q + 1)       # Right
-        nb_6 = (r - 1, q + 1)       # Bottom right
-        neighbours = [nb_1, nb_2, nb_3, nb_4, nb_5, nb_6]
-        valid_nbs = list(filter(lambda nb: self.inbounds(nb), neighbours))
-        empty_nbs = list(filter(lambda nb: nb not in self.occupied, valid_nbs))
-        return empty_nbs
+        occupied = self.occupied
+        return [nb for nb in self.neighbours[coord] if nb not in occupied]
 
     def capture_danger(self, opponent, r, q):
         """ check if our move may cause a capture to us """
@@ -210,8 +158,6 @@ class Board:
     
     def almost_capture(self, player, r, q):
         """ check if we can perform capture in two moves """
-        trial = copy.deepcopy(self)
-        trial.occupied[(r, q)] = player
         choices = defaultdict(int)
         # find neighbours that are opponents
         oppo_nbs = self.find_neighbours((r, q), player.oppo)
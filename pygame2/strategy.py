@@ -2,7 +2,6 @@
 Functions that help the agent to make decisions
 """
 
-import copy
 import random
 
 from pygame2.board import RED, BLUE
@@ -31,17 +30,16 @@ def greedy_eval(board, player):
 def greedy_proceed(board, player):
     """ directly place to location where contributes the winning """
     actions = {}
-    trial = copy.deepcopy(board)
-    tried = list(trial.occupied)
+    tried = list(board.occupied)
     while len(tried) != board.size:
-        coord = random_move(trial.occupied, 0, board.n - 1)
+        coord = random_move(tried, 0, board.n - 1)
         tried.append(coord)
-        trial.occupied[coord] = player.colour
+        board.place_update(player.colour, coord[0], coord[1])
         # evaluate the state
-        value = greedy_eval(trial, player)
+        value = greedy_eval(board, player)
         actions[coord] = value
         # recover the board state
-        trial.occupied.pop(coord)
+        board.remove(coord[0], coord[1])
     action = max(actions, key=actions.get)
     #print("Greedy actions ", actions)
     return action
@@ -148,16 +146,17 @@ def go_capture(board, player):
         # find empty adjacent places
         emp_nbs = board.find_empty_neighbours(t)
         for nb in emp_nbs:
-            trail = copy.deepcopy(board)
-            trail.occupied[nb] = player.colour
-            if trail.valid_capture(player.colour, nb[0], nb[1]):
+            board.place_update(player.colour, nb[0], nb[1])
+            if board.valid_capture(player.colour, nb[0], nb[1]):
+                board.remove(nb[0], nb[1])
                 return nb
             res_emp_nbs = emp_nbs
             res_emp_nbs.remove(nb)
             for i in res_emp_nbs:
-                captures = trail.valid_capture(player.colour, i[0], i[1])
+                captures = board.valid_capture(player.colour, i[0], i[1])
                 if captures:
                     choices[nb] += 1
+            board.remove(nb[0], nb[1])
     if choices:
         action = max(choices, key=choices.get)
         return action
@@ -177,16 +176,15 @@ def minimax(board, player, depth):
         tried.append((r, q))
         
         # start of each branching sub-state is the same as the board state
-        temp_board = copy.deepcopy(board)
-        if not temp_board.is_occupied(r, q):    
+        if not board.is_occupied(r, q):    
             # update current sub-state   
-            temp_board.occupied[(r, q)] = player.colour
-            captures = temp_board.valid_capture(player.colour, r, q)
-            if captures:
-                temp_board.capture_update(captures)
+            board.make_move(player.colour, (r, q))
 
-            value = get_min_value(temp_board, player, alpha, beta, depth)
+            value = get_min_value(board, player, alpha, beta, depth)
             actions[(r, q)] = value
+
+            # return to original state
+            board.unmake_move()
     
     # if next move will reach the end of the game, make corresponding move
     result = check_game_point(board, player)
@@ -209,14 +207,13 @@ def get_max_value(board, player, a, b, depth):
         r, q = random_move(tried, 0, board.n - 1)
         tried.append((r, q))
             
-        temp_board = copy.deepcopy(board)
-        if not temp_board.is_occupied(r, q):
-            temp_board.occupied[(r, q)] = player.colour
-            captures = temp_board.valid_capture(player.colour, r, q)
-            if captures:
-                temp_board.capture_update(captures)
-
-            a = max(a, get_min_value(temp_board, player, a, b, depth))
+        if not board.is_occupied(r, q):
+            board.make_move(player.colour, (r, q))
+
+            a = max(a, get_min_value(board, player, a, b, depth))
+
+            # return to original state
+            board.unmake_move()
             
             if a >= b:
                 return b
@@ -233,14 +230,13 @@ def get_min_value(board, player, a, b, depth):
         r, q = random_move(tried, 0, board.n - 1)
         tried.append((r, q))
             
-        temp_board = copy.deepcopy(board)
-        if not temp_board.is_occupied(r, q):
-            temp_board.occupied[(r, q)] = player.oppo
-            captures = temp_board.valid_capture(player.oppo, r, q)
-            if captures:
-                temp_board.capture_update(captures)
+        if not board.is_occupied(r, q):
+            board.make_move(player.oppo, (r, q))
             
-            b = min(b, get_max_value(temp_board, player, a, b, depth))
+            b = min(b, get_max_value(board, player, a, b, depth))
+
+            # return to original state
+            board.unmake_move()
             if b <= a:
                 return a
     return b
@@ -251,44 +247,47 @@ def check_game_point(board, player):
     for r in range(board.n):
         for q in range(board.n):
             if not board.is_occupied(r, q):
-                trial = copy.deepcopy(board)
                 # check if I will win the game
-                trial.occupied[(r, q)] = player.colour
-                winner = trial.end_game()
+                board.place_update(player.colour, r, q)
+                winner = board.end_game()
+                board.remove(r, q)
                 if winner == player.colour:
                     return (r, q), float('inf')
 
                 # check if opponent will win the game
-                trial.occupied[(r, q)] = player.oppo
-                winner = trial.end_game()
+                board.place_update(player.oppo, r, q)
+                winner = board.end_game()
+                board.remove(r, q)
                 if winner == player.oppo:
                     # attempt to save our life
-                    coord, value = attempt_save_life(trial, player, (r, q))
+                    coord, value = attempt_save_life(board, player, (r, q))
                     if coord:
                         return coord, value
                     # can't save :(
                     return 0
     return 0
 
-def attempt_save_life(end_board, player, game_point):
-    # recover the board
-    end_board.occupied.pop(game_point)
+def attempt_save_life(board, player, game_point):
+    gr, gq = game_point
     # attemp by using capture
-    for r in range(end_board.n):
-        for q in range(end_board.n):
-            if not end_board.is_occupied(r, q):
-                trial = copy.deepcopy(end_board)                
-                captures = trial.valid_capture(player.colour, r, q)
-                if captures:
-                    trial.capture_update(captures)
+    for r in range(board.n):
+        for q in range(board.n):
+            if not board.is_occupied(r, q) and game_point != (r, q):
+                board.make_move(player.colour, (r, q))
                 # put the game point back and check again
-                trial.occupied[game_point] = player.oppo
-                if not trial.end_game():
+                board.place_update(player.oppo, gr, gq)
+                saved = not board.end_game()
+                board.remove(gr, gq)
+                # recover the board
+                board.unmake_move()
+                if saved:
                     return (r, q), float('inf')
 
     # attemp by placing on the game point
-    end_board.occupied[game_point] = player.colour
-    if not end_board.end_game():
+    board.place_update(player.colour, gr, gq)
+    saved = not board.end_game()
+    board.remove(gr, gq)
+    if saved:
         return game_point, float('inf')
     
     return None, None
@@ -0,0 +1,304 @@
+"""
+Driver program to play many games between two Player classes without
+output, spread over a pool of worker processes, and report how the first
+did against the second:
+
+-----------------------------------------------------------------------------
+usage: python -m referee.batch [-h] [-g games] [-j jobs] [-s [space_limit]]
+                               [-t [time_limit]] [-v [{0,1}]]
+                               red blue n [n ...]
+
+The players swap colours every game, so `red` is only the colour the first
+player has in the first game. Given several board sizes, the games cycle
+through them. Results are counted for the first player: wins, draws and
+losses with 95% confidence intervals, its score (a draw is half a win) and
+the rating difference that score implies.
+-----------------------------------------------------------------------------
+"""
+
+import os
+import math
+import argparse
+import multiprocessing
+
+from referee.log import config, print, comment
+from referee.game import play, IllegalActionException, COLOURS
+from referee.player import PlayerWrapper
+from referee.player import ResourceLimitException, set_space_line
+from referee.options import PackageSpecAction
+from referee.options import SPACE_LIMIT_DEFAULT, SPACE_LIMIT_NOVALUE
+from referee.options import TIME_LIMIT_DEFAULT, TIME_LIMIT_NOVALUE
+
+PROGRAM = "python -m referee.batch"
+DESCRIP = "play many games of Cachex between 2 Player classes, in parallel."
+
+GAMES_DEFAULT = 100
+
+# Normal quantile of a two-sided 95% confidence interval
+Z_95 = 1.96
+
+# Outcomes of a game, for the first player
+WIN, DRAW, LOSS = 1.0, 0.5, 0.0
+
+
+def main():
+    options = get_options()
+    config(level=options.verbosity)
+
+    sizes = options.n
+    games = [
+        (options.player1_loc, options.player2_loc, sizes[i % len(sizes)],
+         i % 2 == 1, options.time, options.space)
+        for i in range(options.games)
+    ]
+    tally = Tally()
+    try:
+        # A fresh process for every game: the space limit reads the peak
+        # memory of the whole process, which must not carry over games
+        with multiprocessing.Pool(options.jobs, quiet_worker, maxtasksperchild=1) as pool:
+            for i, (n, swapped, outcome, result) in enumerate(
+                pool.imap_unordered(_play_game, games), 1
+            ):
+                tally.add(outcome, swapped, result)
+                colour = COLOURS[1] if swapped else COLOURS[0]
+                comment(f"game {i}/{options.games}: n = {n}, "
+                        f"first player {colour}: {result}")
+    except KeyboardInterrupt:
+        print("interrupted! results of the games finished so far:")
+
+    first, second = (":".join(loc) for loc in (options.player1_loc, options.player2_loc))
+    print(f"{first} vs {second}, n = {', '.join(map(str, sizes))}")
+    for line in tally.report():
+        print(line)
+
+
+def play_game(first_loc, second_loc, n, swapped=False, time_limit=None,
+              space_limit=None):
+    """
+    Play one game without output, return (outcome, result): the outcome
+    for the first player (WIN, DRAW or LOSS) and a string describing the
+    result. The first player is Red unless swapped. A player that makes
+    an illegal action, runs out of resources or raises an error loses.
+    """
+    locs = (second_loc, first_loc) if swapped else (first_loc, second_loc)
+    players = [
+        _BatchPlayerWrapper(f"player {num}", loc, time_limit, space_limit)
+        for num, loc in enumerate(locs, 1)
+    ]
+    set_space_line()
+
+    first = COLOURS[1] if swapped else COLOURS[0]
+    try:
+        result = play(players, n=n, print_state=False)
+    except (IllegalActionException, ResourceLimitException) as e:
+        loser = _BatchPlayerWrapper.current
+        winner = COLOURS[1] if loser == COLOURS[0] else COLOURS[0]
+        result = f"winner: {winner} ({loser} error: {e})"
+    # An error from the player itself should not stop the other games
+    except Exception as e:
+        loser = _BatchPlayerWrapper.current
+        winner = COLOURS[1] if loser == COLOURS[0] else COLOURS[0]
+        result = f"winner: {winner} ({loser} error: {type(e).__name__}: {e})"
+
+    if result.startswith("winner: "):
+        winner = result.split()[1]
+        return (WIN if winner == first else LOSS), result
+    return DRAW, result
+
+
+class Tally:
+    """
+    Outcomes of a run of games for the first player, overall and by the
+    colour it played.
+    """
+
+    def __init__(self):
+        self.outcomes = {WIN: 0, DRAW: 0, LOSS: 0}
+        self.by_colour = {colour: {WIN: 0, DRAW: 0, LOSS: 0} for colour in COLOURS}
+        self.errors = 0
+
+    def add(self, outcome, swapped, result):
+        self.outcomes[outcome] += 1
+        self.by_colour[COLOURS[1] if swapped else COLOURS[0]][outcome] += 1
+        if " error: " in result:
+            self.errors += 1
+
+    def games(self):
+        return sum(self.outcomes.values())
+
+    def report(self):
+        """
+        Lines describing the outcomes.
+        """
+        games = self.games()
+        lines = [f"games: {games}"]
+        for name, outcome in (("wins", WIN), ("draws", DRAW), ("losses", LOSS)):
+            count = self.outcomes[outcome]
+            low, high = wilson_interval(count, games)
+            rate = count / games if games else 0
+            lines.append(f"{name + ':':8} {count:6} {rate:7.1%}  "
+                         f"[{low:.1%}, {high:.1%}]")
+        for colour, outcomes in self.by_colour.items():
+            lines.append(f"as {colour + ':':6} {outcomes[WIN]} wins, "
+                         f"{outcomes[DRAW]} draws, {outcomes[LOSS]} losses")
+        if games:
+            score, margin = mean_interval(self.outcomes)
+            low, high = (elo_difference(s) for s in (score - margin, score + margin))
+            lines.append(f"score:   {score:.1%} +- {margin:.1%}  (elo "
+                         f"{elo_difference(score):+.0f} [{low:+.0f}, {high:+.0f}])")
+        if self.errors:
+            lines.append(f"errors:  {self.errors} games ended by an error")
+        return lines
+
+
+def wilson_interval(count, games, z=Z_95):
+    """
+    Confidence interval (low, high) of a rate, from `count` successes in
+    `games` trials (Wilson score interval, which behaves near 0 and 1).
+    """
+    if not games:
+        return 0.0, 1.0
+    p = count / games
+    denom = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denom
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def mean_interval(outcomes, z=Z_95):
+    """
+    Mean score of a count of outcomes by score, and the half width of its
+    confidence interval (normal approximation).
+    """
+    games = sum(outcomes.values())
+    mean = sum(score * count for score, count in outcomes.items()) / games
+    variance = sum(count * (score - mean) ** 2 for score, count in outcomes.items()) / games
+    return mean, z * math.sqrt(variance / games)
+
+
+def elo_difference(score):
+    """
+    Rating difference (Elo) that gives the expected score, clamped away
+    from the infinite differences of a score of 0 or 1.
+    """
+    score = min(max(score, 0.001), 0.999)
+    return -400 * math.log10(1 / score - 1)
+
+
+def get_options():
+    """Parse and return command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog=PROGRAM,
+        description=DESCRIP,
+        epilog="The players are given as package specifications, as for "
+        "the referee\n(e.g. 'your_team_name' or 'your_team_name:DifferentPlayer').",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    for num, col in enumerate(COLOURS, 1):
+        parser.add_argument(
+            f"player{num}_loc",
+            metavar=col,
+            action=PackageSpecAction,
+            help=f"location of the Player class that is {col.title()} in the "
+            "first game (e.g. package name)",
+        )
+    parser.add_argument(
+        "n",
+        type=int,
+        nargs="+",
+        choices=range(3, 16),
+        help="size of the game board (several sizes: the games cycle "
+        "through them)",
+    )
+    parser.add_argument(
+        "-g",
+        "--games",
+        metavar="games",
+        type=int,
+        default=GAMES_DEFAULT,
+        help="number of games to play (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of games to play at once, each in its own process "
+        "(default: number of CPUs, %(default)s).",
+    )
+    parser.add_argument(
+        "-s",
+        "--space",
+        metavar="space_limit",
+        type=float,
+        nargs="?",
+        default=SPACE_LIMIT_DEFAULT,
+        const=SPACE_LIMIT_NOVALUE,
+        help="limit on memory space (float, MB) for each player.",
+    )
+    parser.add_argument(
+        "-t",
+        "--time",
+        metavar="time_limit",
+        type=float,
+        nargs="?",
+        default=TIME_LIMIT_DEFAULT,
+        const=TIME_LIMIT_NOVALUE,
+        help="limit on CPU time (float, seconds) for each player.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbosity",
+        type=int,
+        choices=range(0, 2),
+        nargs="?",
+        default=0,
+        const=1,
+        help="0: (default) only the final results; 1: also the result of "
+        "each game as it finishes.",
+    )
+    return parser.parse_args()
+
+
+class _BatchPlayerWrapper(PlayerWrapper):
+    """
+    A PlayerWrapper that remembers whose method the referee called last, to
+    know who is to blame when a game ends in an error.
+    """
+
+    # Colour of the player called last
+    current = None
+
+    def init(self, colour, n):
+        _BatchPlayerWrapper.current = colour
+        super().init(colour, n)
+
+    def action(self):
+        _BatchPlayerWrapper.current = self.colour
+        return super().action()
+
+    def turn(self, player, action):
+        _BatchPlayerWrapper.current = self.colour
+        super().turn(player, action)
+
+
+def quiet_worker():
+    """
+    Silence the referee in a worker process.
+    """
+    config(level=0)
+
+
+def _play_game(game):
+    """
+    play_game() for Pool.imap_unordered(), returns the board size and
+    colours with the outcome.
+    """
+    first_loc, second_loc, n, swapped, time_limit, space_limit = game
+    outcome, result = play_game(first_loc, second_loc, n, swapped, time_limit, space_limit)
+    return n, swapped, outcome, result
+
+
+if __name__ == "__main__":
+    main()
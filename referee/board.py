@@ -7,36 +7,15 @@ This board representation is designed to be used internally by the referee
 for the purposes of validating actions and displaying the result of the game.
 Each player is expected to store its own internal representation of the board
 for use in informing decisions about which action to choose each turn. Please
-don't assume this class is an "ideal" board representation for your own agent; 
-you should think carefully about how to design your own data structures for 
-representing the state of a game, with respect to your chosen strategy. 
+don't assume this class is an "ideal" board representation for your own agent;
+you should think carefully about how to design your own data structures for
+representing the state of a game, with respect to your chosen strategy.
 """
 
-from queue import Queue
-from numpy import zeros, array, roll, vectorize
-
-# Utility function to add two coord tuples
-_ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
-
-# Neighbour hex steps in clockwise order
-_HEX_STEPS = array([(1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1)], 
-    dtype="i,i")
-
-# Pre-compute diamond capture patterns - each capture pattern is a 
-# list of offset steps:
-# [opposite offset, neighbour 1 offset, neighbour 2 offset]
-#
-# Note that the "opposite cell" offset is actually the sum of
-# the two neighbouring cell offsets (for a given diamond formation)
-#
-# Formed diamond patterns are either "longways", in which case the
-# neighbours are adjacent to each other (roll 1), OR "sideways", in
-# which case the neighbours are spaced apart (roll 2). This means
-# for a given cell, it is part of 6 + 6 possible diamonds.
-_CAPTURE_PATTERNS = [[_ADD(n1, n2), n1, n2] 
-    for n1, n2 in 
-        list(zip(_HEX_STEPS, roll(_HEX_STEPS, 1))) + 
-        list(zip(_HEX_STEPS, roll(_HEX_STEPS, 2)))]
+from collections import deque
+from functools import lru_cache
+
+from referee.tables import neighbour_table, capture_table, zobrist_table
 
 # Maps between player string and internal token type
 _TOKEN_MAP_OUT = { 0: None, 1: "red", 2: "blue" }
@@ -45,41 +24,72 @@ _TOKEN_MAP_IN = {v: k for k, v in _TOKEN_MAP_OUT.items()}
 # Map between player token types
 _SWAP_PLAYER = { 0: 0, 1: 2, 2: 1 }
 
+# The same as a byte translation table, for swapping a whole grid at once
+_SWAP_TABLE = bytes(_SWAP_PLAYER.get(t, t) for t in range(256))
+
 class Board:
     def __init__(self, n):
         """
         Initialise board of given size n.
         """
         self.n = n
-        self._data = zeros((n, n), dtype=int)
+        # Token types of the cells, row by row: cell (r, q) at r * n + q
+        self._data = bytearray(n * n)
+        self._parent = list(range(n * n + 4))
+        # Zobrist hash of the tokens (see referee.tables.zobrist_table)
+        self.hash = 0
 
     def __getitem__(self, coord):
         """
         Get the token at given board coord (r, q).
         """
-        return _TOKEN_MAP_OUT[self._data[coord]]
+        r, q = coord
+        return _TOKEN_MAP_OUT[self._data[r * self.n + q]]
 
     def __setitem__(self, coord, token):
         """
-        Set the token at given board coord (r, q).
+        Set the token at given board coord (r, q), keeping the hash and the
+        groups of tokens up to date.
         """
-        self._data[coord] = _TOKEN_MAP_IN[token]
+        r, q = coord
+        cell = r * self.n + q
+        old_type = self._data[cell]
+        token_type = _TOKEN_MAP_IN[token]
+        keys = _zobrist_keys(self.n)
+        self.hash ^= keys[old_type][cell] ^ keys[token_type][cell]
+        self._data[cell] = token_type
+        if old_type:
+            # Taking a token away may split its group, which union-find
+            # cannot undo: group all tokens again
+            self._relink()
+        elif token_type:
+            self._link(cell)
 
     def digest(self):
         """
-        Digest of the board state (to help with counting repeated states).
-        Could use a hash function, but not really necessary for our purposes.
+        Exact digest of the board state, packing the token types of four
+        cells into each byte. For counting repeated states the 64-bit hash
+        usually does; this tells states apart whose hashes collide.
         """
-        return self._data.tobytes()
+        data = self._data + bytes(-len(self._data) % 4)
+        return bytes(
+            a | b << 2 | c << 4 | d << 6
+            for a, b, c, d in zip(data[::4], data[1::4], data[2::4], data[3::4])
+        )
 
     def swap(self):
         """
-        Swap player positions by mirroring the state along the major 
+        Swap player positions by mirroring the state along the major
         board axis. This is really just a "matrix transpose" op combined
         with a swap between player token types.
         """
-        swap_player_tokens = vectorize(lambda t: _SWAP_PLAYER[t])
-        self._data = swap_player_tokens(self._data.transpose())
+        transposed = bytes(map(self._data.__getitem__, _transpose_table(self.n)))
+        self._data = bytearray(transposed.translate(_SWAP_TABLE))
+        self._relink()
+        keys = _zobrist_keys(self.n)
+        self.hash = 0
+        for cell, token_type in enumerate(self._data):
+            self.hash ^= keys[token_type][cell]
 
     def place(self, token, coord):
         """
@@ -87,28 +97,44 @@ class Board:
         Return coordinates of captured tokens.
         """
         self[coord] = token
-        return self._apply_captures(coord)
+        captured = self._apply_captures(coord)
+        if captured:
+            # As when setting cells: captures may have split groups
+            self._relink()
+        return captured
+
+    def connects(self, token):
+        """
+        True iff the tokens of the given player form a path joining its
+        two edges of the board (rows 0 and n - 1 for red, columns 0 and
+        n - 1 for blue).
+        """
+        start, end = _edge_nodes(self.n)[_TOKEN_MAP_IN[token]]
+        return self._find(start) == self._find(end)
 
     def connected_coords(self, start_coord):
         """
-        Find connected coordinates from start_coord. This uses the token 
+        Find connected coordinates from start_coord. This uses the token
         value of the start_coord cell to determine which other cells are
         connected (e.g., all will be the same value).
         """
+        n = self.n
+        data = self._data
+
         # Get search token type
-        token_type = self._data[start_coord]
+        r, q = start_coord
+        token_type = data[r * n + q]
 
         # Use bfs from start coordinate
-        reachable = set()
-        queue = Queue(0)
-        queue.put(start_coord)
-
-        while not queue.empty():
-            curr_coord = queue.get()
-            reachable.add(curr_coord)
+        reachable = {start_coord}
+        queue = deque([start_coord])
+        while queue:
+            curr_coord = queue.popleft()
             for coord in self._coord_neighbours(curr_coord):
-                if coord not in reachable and self._data[coord] == token_type:
-                    queue.put(coord)
+                r, q = coord
+                if coord not in reachable and data[r * n + q] == token_type:
+                    reachable.add(coord)
+                    queue.append(coord)
 
         return list(reachable)
 
@@ -130,30 +156,131 @@ class Board:
         Check coord for diamond captures, and apply these to the board
         if they exist. Returns a list of captured token coordinates.
         """
-        opp_type = self._data[coord]
+        n = self.n
+        data = self._data
+        r, q = coord
+        cell = r * n + q
+        opp_type = data[cell]
         mid_type = _SWAP_PLAYER[opp_type]
         captured = set()
 
-        # Check each capture pattern intersecting with coord
-        for pattern in _CAPTURE_PATTERNS:
-            coords = [_ADD(coord, s) for s in pattern]
-            # No point checking if any coord is outside the board!
-            if all(map(self.inside_bounds, coords)):
-                tokens = [self._data[coord] for coord in coords]
-                if tokens == [opp_type, mid_type, mid_type]:
-                    # Capturing has to be deferred in case of overlaps
-                    # Both mid cell tokens should be captured
-                    captured.update(coords[1:])
+        # Check each (in-bounds) capture pattern intersecting with coord
+        for opposite, mid1, mid2 in _capture_indices(n)[cell]:
+            if data[opposite] == opp_type and data[mid1] == mid_type \
+                    and data[mid2] == mid_type:
+                # Capturing has to be deferred in case of overlaps
+                # Both mid cell tokens should be captured
+                captured.update((mid1, mid2))
 
         # Remove any captured tokens
-        for coord in captured:
-            self[coord] = None
+        keys = _zobrist_keys(n)[mid_type]
+        for cell in captured:
+            data[cell] = 0
+            self.hash ^= keys[cell]
 
-        return list(captured)
+        return [divmod(cell, n) for cell in captured]
 
     def _coord_neighbours(self, coord):
         """
         Returns (within-bounds) neighbouring coordinates for given coord.
         """
-        return [_ADD(coord, step) for step in _HEX_STEPS \
-            if self.inside_bounds(_ADD(coord, step))]
+        return neighbour_table(self.n)[coord]
+
+    def _find(self, node):
+        """
+        Root of the group of a node (a cell, or an edge of the board), with
+        path halving.
+        """
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _link(self, cell):
+        """
+        Join the group of the token on a cell with the groups of the same
+        tokens next to it, and with the player's edges it is on.
+        """
+        token_type = self._data[cell]
+        parent = self._parent
+        root = self._find(cell)
+        for node in _link_table(self.n)[token_type][cell]:
+            if node >= len(self._data) or self._data[node] == token_type:
+                other = self._find(node)
+                if other != root:
+                    parent[other] = root
+
+    def _relink(self):
+        """
+        Group all tokens from scratch.
+        """
+        self._parent = list(range(len(self._parent)))
+        for cell, token_type in enumerate(self._data):
+            if token_type:
+                self._link(cell)
+
+
+@lru_cache(maxsize=None)
+def _edge_nodes(n):
+    """
+    Union-find nodes of the two edges of each token type, numbered after
+    the cells.
+    """
+    return {1: (n * n, n * n + 1), 2: (n * n + 2, n * n + 3)}
+
+
+@lru_cache(maxsize=None)
+def _link_table(n):
+    """
+    For each token type and cell (as r * n + q), the nodes a token on the
+    cell may join: the neighbouring cells, and the player's edges the
+    cell is on.
+    """
+    table = {}
+    for token_type, axis in ((1, 0), (2, 1)):
+        start, end = _edge_nodes(n)[token_type]
+        nodes = []
+        for (r, q), neighbours in sorted(neighbour_table(n).items()):
+            links = [nr * n + nq for nr, nq in neighbours]
+            if (r, q)[axis] == 0:
+                links.append(start)
+            if (r, q)[axis] == n - 1:
+                links.append(end)
+            nodes.append(tuple(links))
+        table[token_type] = nodes
+    return table
+
+
+@lru_cache(maxsize=None)
+def _zobrist_keys(n):
+    """
+    zobrist_table() of a board by token type and cell (as r * n + q), with
+    keys of 0 for empty cells.
+    """
+    table = zobrist_table(n)
+    cells = sorted(table)
+    return [[0] * (n * n)] + [
+        [table[cell][_TOKEN_MAP_OUT[token_type]] for cell in cells]
+        for token_type in (1, 2)
+    ]
+
+
+@lru_cache(maxsize=None)
+def _capture_indices(n):
+    """
+    capture_table() of a board, with cells given as r * n + q.
+    """
+    return [
+        tuple(tuple(r * n + q for r, q in diamond) for diamond in diamonds)
+        for _, diamonds in sorted(capture_table(n).items())
+    ]
+
+
+@lru_cache(maxsize=None)
+def _transpose_table(n):
+    """
+    For each cell (as r * n + q), the cell it is mirrored from by a
+    transpose.
+    """
+    return [q * n + r for r in range(n) for q in range(n)]
@@ -36,6 +36,7 @@ def play(
     log_filename=None,
     log_file=None,
     out_function=comment,
+    verify_history=False,
 ):
     """
     Coordinate a game, return a string describing the result.
@@ -55,6 +56,8 @@ def play(
     * log_filename   -- If not None, log all game actions to this path.
     * out_function   -- Use this function (instead of default 'comment')
                         for all output messages.
+    * verify_history -- If True, tell repeated states apart exactly, not
+                        only by their hash (see Game).
     """
     # Configure behaviour of this function depending on parameters:
     if delay > 0:
@@ -94,7 +97,8 @@ def play(
 
     # Set up a new game and initialise the players (constructing the
     # Player classes including running their .__init__() methods).
-    game = Game(n, log_filename=log_filename, log_file=log_file)
+    game = Game(n, log_filename=log_filename, log_file=log_file,
+                verify_history=verify_history)
     comment("initialising players", depth=-1)
     for player, colour in zip(players, COLOURS):
         # NOTE: `player` here is actually a player wrapper. Your program
@@ -138,11 +142,6 @@ def play(
 # Game rules implementation
 #
 
-_PLAYER_AXIS = {
-    "red": 0, # Red aims to form path in r/0 axis
-    "blue": 1 # Blue aims to form path in q/1 axis
-}
-
 _PLAYER_TURN_ORDER = ["red", "blue"] # Red always goes first
 
 # Actions
@@ -168,9 +167,15 @@ class Game:
     """
     Represent the evolving state of a game. Main useful methods
     are __init__, update, over, end, and __str__.
+
+    Repeated states are counted by the board's 64-bit hash. With
+    verify_history, the packed digest of the first state seen with each
+    hash is kept too, so that a different state with the same hash is
+    counted apart from it.
     """
 
-    def __init__(self, n, log_filename=None, log_file=None):
+    def __init__(self, n, log_filename=None, log_file=None,
+                 verify_history=False):
         # Initialise game board
         self.board = Board(n)
 
@@ -179,7 +184,9 @@ class Game:
         self.nturns = 0
         self.last_captures = []
         self.last_coord = (-1, -1)
-        self.history = collections.Counter({self.board.digest(): 1})
+        self.verify_history = verify_history
+        self.digests = {}
+        self.history = collections.Counter({self._state_key(): 1})
         self.result = None
         self.result_cluster = set()
 
@@ -314,24 +321,26 @@ class Game:
         """
         # Register turn
         self.nturns += 1
-        self.history[self.board.digest()] += 1
+        state = self._state_key()
+        self.history[state] += 1
 
         # Game end conditions
 
         # Condition 1: player forms a continuous path spanning board (win).
-        # check reachable coords from just-placed token to detect winning path
+        # the board keeps its groups joined to the edges, so this is just a
+        # check whether the player's two edges are in the same group (a new
+        # path must pass through the just-placed token)
         # NOTE: No point checking this while total turns is less than 2n - 1
         if self.nturns >= (self.board.n * 2) - 1:
-            _, r, q = action
-            reachable = self.board.connected_coords((r, q))
-            axis_vals = [coord[_PLAYER_AXIS[player]] for coord in reachable]
-            if min(axis_vals) == 0 and max(axis_vals) == self.board.n - 1:
+            if self.board.connects(player):
                 self.result = "winner: " + player
-                self.result_cluster = set(reachable)
+                self.result_cluster = set(
+                    self.board.connected_coords(self.last_coord)
+                )
                 return
 
         # Condition 2: the same state has occurred too many times (draw)
-        if self.history[self.board.digest()] >= _MAX_REPEAT_STATES:
+        if self.history[state] >= _MAX_REPEAT_STATES:
             self.result = f"draw: same game state occurred \
                 {_MAX_REPEAT_STATES} times"
             return
@@ -344,6 +353,18 @@ class Game:
         # No end conditions met, game continues
         return
 
+    def _state_key(self):
+        """
+        Key of the current board state in the history: its hash, or (hash,
+        digest) if verifying and another state had the same hash first.
+        """
+        key = self.board.hash
+        if self.verify_history:
+            digest = self.board.digest()
+            if self.digests.setdefault(key, digest) != digest:
+                key = (key, digest)
+        return key
+
     def over(self):
         """
         True iff the game has terminated.
@@ -0,0 +1,296 @@
+"""
+Driver program to rank several Player classes in a round-robin league:
+every pair plays with both colours, each round, in a pool of worker
+processes, and the players are rated (Elo) from all the results so far.
+
+-----------------------------------------------------------------------------
+usage: python -m referee.league [-h] [-n n [n ...]] [-r rounds] [-j jobs]
+                                [-f checkpoint] [-s [space_limit]]
+                                [-t [time_limit]] [-v [{0,1}]]
+                                player player [player ...]
+
+Every finished game is written to the checkpoint file (a JSON file) right
+away. Run the same command again after a crash, or with more rounds, and
+the games already in the file are not played again.
+-----------------------------------------------------------------------------
+"""
+
+import os
+import json
+import math
+import argparse
+import itertools
+import multiprocessing
+
+from referee.log import config, print, comment
+from referee.game import COLOURS
+from referee.options import parse_package_spec
+from referee.options import SPACE_LIMIT_DEFAULT, SPACE_LIMIT_NOVALUE
+from referee.options import TIME_LIMIT_DEFAULT, TIME_LIMIT_NOVALUE
+from referee.batch import play_game, quiet_worker, WIN, DRAW, LOSS
+
+PROGRAM = "python -m referee.league"
+DESCRIP = "rank Player classes in a round-robin league of Cachex games."
+
+ROUNDS_DEFAULT = 10
+SIZES_DEFAULT = [5]
+CHECKPOINT_DEFAULT = "league.json"
+
+# Fitting ratings: every player is given this many draws against a player
+# rated 0, so that all-win or all-loss records still get finite ratings
+PRIOR_DRAWS = 1
+FIT_ITERATIONS = 200
+
+
+def main():
+    options = get_options()
+    config(level=options.verbosity)
+
+    players = options.players
+    league = League(options.checkpoint)
+    schedule = [game for game in league.schedule(players, options.sizes, options.rounds)
+                if not league.played(game)]
+    comment(f"{len(league.games)} games in {options.checkpoint}, "
+            f"{len(schedule)} to play")
+
+    args = [(game, options.time, options.space) for game in schedule]
+    try:
+        # A fresh process for every game, as in referee.batch: the space
+        # limit reads the peak memory of the whole process
+        with multiprocessing.Pool(options.jobs, quiet_worker, maxtasksperchild=1) as pool:
+            for i, (game, result) in enumerate(pool.imap_unordered(_play_league_game, args), 1):
+                league.add(game, result)
+                league.save()
+                comment(f"game {i}/{len(schedule)}: {game['red']} (red) vs "
+                        f"{game['blue']} (blue), n = {game['n']}: {result}")
+    except KeyboardInterrupt:
+        print("interrupted! run again to play the remaining games.")
+
+    for line in league.standings(players):
+        print(line)
+
+
+class League:
+    """
+    The results of a league, kept in a JSON checkpoint file. A game is a
+    dict: the round, board size n, and red and blue players (package
+    specifications), plus the result once it is played.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.games = []
+        if os.path.exists(path):
+            with open(path) as f:
+                self.games = json.load(f)["games"]
+        self.keys = {self.key(game) for game in self.games}
+
+    @staticmethod
+    def key(game):
+        return game["round"], game["n"], game["red"], game["blue"]
+
+    @staticmethod
+    def schedule(players, sizes, rounds):
+        """
+        All the games of a league: each round, every pair of players meets
+        once with each colour, on the size of board for that round.
+        """
+        return [
+            {"round": r, "n": sizes[r % len(sizes)], "red": red, "blue": blue}
+            for r in range(rounds)
+            for first, second in itertools.combinations(players, 2)
+            for red, blue in ((first, second), (second, first))
+        ]
+
+    def played(self, game):
+        return self.key(game) in self.keys
+
+    def add(self, game, result):
+        self.games.append({**game, "result": result})
+        self.keys.add(self.key(game))
+
+    def save(self):
+        """
+        Write the results to the checkpoint file. The file is replaced in
+        one step, so a crash leaves either the old or the new results.
+        """
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump({"games": self.games}, f, indent=1)
+        os.replace(temp, self.path)
+
+    def scores(self, players):
+        """
+        Score (WIN, DRAW or LOSS) of the red player for each game between
+        the given players, as (red, blue, score).
+        """
+        players = set(players)
+        scores = []
+        for game in self.games:
+            if game["red"] in players and game["blue"] in players:
+                result = game["result"]
+                if result.startswith("winner: "):
+                    score = WIN if result.split()[1] == COLOURS[0] else LOSS
+                else:
+                    score = DRAW
+                scores.append((game["red"], game["blue"], score))
+        return scores
+
+    def standings(self, players):
+        """
+        Lines of a table of the players, best rated first.
+        """
+        scores = self.scores(players)
+        ratings = fit_ratings(players, scores)
+        games = dict.fromkeys(players, 0)
+        points = dict.fromkeys(players, 0.0)
+        for red, blue, score in scores:
+            games[red] += 1
+            games[blue] += 1
+            points[red] += score
+            points[blue] += 1 - score
+        width = max(len(player) for player in players)
+        lines = [f"{'player':{width}}  {'games':>6} {'score':>7} {'elo':>6}"]
+        for player in sorted(players, key=ratings.get, reverse=True):
+            score = points[player] / games[player] if games[player] else 0
+            lines.append(f"{player:{width}}  {games[player]:6} {score:7.1%} "
+                         f"{ratings[player]:+6.0f}")
+        return lines
+
+
+def fit_ratings(players, scores):
+    """
+    Elo ratings of the players that best explain the scores (a list of
+    (red, blue, score of red)), averaging 0. A maximum likelihood fit of
+    the Bradley-Terry model, which counts a draw as half a win, by the
+    minorization-maximization updates.
+    """
+    # Half a point and one game against a player of strength 1 per draw
+    points = dict.fromkeys(players, PRIOR_DRAWS / 2)
+    meetings = {player: {} for player in players}
+    for red, blue, score in scores:
+        points[red] += score
+        points[blue] += 1 - score
+        meetings[red][blue] = meetings[red].get(blue, 0) + 1
+        meetings[blue][red] = meetings[blue].get(red, 0) + 1
+
+    strength = dict.fromkeys(players, 1.0)
+    for _ in range(FIT_ITERATIONS):
+        for player in players:
+            total = PRIOR_DRAWS / (strength[player] + 1)
+            for other, count in meetings[player].items():
+                total += count / (strength[player] + strength[other])
+            strength[player] = points[player] / total
+
+    ratings = {player: 400 * math.log10(strength[player]) for player in players}
+    mean = sum(ratings.values()) / len(ratings)
+    return {player: rating - mean for player, rating in ratings.items()}
+
+
+def get_options():
+    """Parse and return command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog=PROGRAM,
+        description=DESCRIP,
+        epilog="The players are given as package specifications, as for "
+        "the referee\n(e.g. 'your_team_name' or 'your_team_name:DifferentPlayer').",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "players",
+        metavar="player",
+        nargs="+",
+        help="location of a Player class (e.g. package name)",
+    )
+    parser.add_argument(
+        "-n",
+        "--sizes",
+        metavar="n",
+        type=int,
+        nargs="+",
+        choices=range(3, 16),
+        default=SIZES_DEFAULT,
+        help="size of the game board (several sizes: the rounds cycle "
+        "through them) (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-r",
+        "--rounds",
+        metavar="rounds",
+        type=int,
+        default=ROUNDS_DEFAULT,
+        help="number of rounds; each pair of players meets twice per round, "
+        "once with each colour (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of games to play at once, each in its own process "
+        "(default: number of CPUs, %(default)s).",
+    )
+    parser.add_argument(
+        "-f",
+        "--checkpoint",
+        metavar="checkpoint",
+        default=CHECKPOINT_DEFAULT,
+        help="JSON file keeping the results, to resume from "
+        "(default: %(default)s).",
+    )
+    parser.add_argument(
+        "-s",
+        "--space",
+        metavar="space_limit",
+        type=float,
+        nargs="?",
+        default=SPACE_LIMIT_DEFAULT,
+        const=SPACE_LIMIT_NOVALUE,
+        help="limit on memory space (float, MB) for each player.",
+    )
+    parser.add_argument(
+        "-t",
+        "--time",
+        metavar="time_limit",
+        type=float,
+        nargs="?",
+        default=TIME_LIMIT_DEFAULT,
+        const=TIME_LIMIT_NOVALUE,
+        help="limit on CPU time (float, seconds) for each player.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbosity",
+        type=int,
+        choices=range(0, 2),
+        nargs="?",
+        default=1,
+        const=1,
+        help="0: only the final standings; 1: (default) also the result of "
+        "each game as it finishes.",
+    )
+    args = parser.parse_args()
+    # name the players by their normalised specifications, so that two
+    # ways of writing the same one are the same player
+    args.players = list(dict.fromkeys(
+        ":".join(parse_package_spec(spec)) for spec in args.players
+    ))
+    if len(args.players) < 2:
+        parser.error("a league needs at least 2 different players")
+    return args
+
+
+def _play_league_game(args):
+    """
+    Play a game of the league in a worker process, returns the game and
+    its result.
+    """
+    game, time_limit, space_limit = args
+    red, blue = (parse_package_spec(game[colour]) for colour in COLOURS)
+    _, result = play_game(red, blue, game["n"], False, time_limit, space_limit)
+    return game, result
+
+
+if __name__ == "__main__":
+    main()
@@ -295,21 +295,26 @@ def get_options():
     return args
 
 
-class PackageSpecAction(argparse.Action):
-    def __call__(self, parser, namespace, values, option_string=None):
-        pkg_spec = values
+def parse_package_spec(pkg_spec):
+    """
+    Convert a package specification (see PKG_SPEC_HELP) into a tuple
+    (module name, class name).
+    """
+    # detect alternative class:
+    if ":" in pkg_spec:
+        pkg, cls = pkg_spec.split(":", maxsplit=1)
+    else:
+        pkg = pkg_spec
+        cls = "Player"
 
-        # detect alternative class:
-        if ":" in pkg_spec:
-            pkg, cls = pkg_spec.split(":", maxsplit=1)
-        else:
-            pkg = pkg_spec
-            cls = "Player"
+    # try to convert path to module name
+    mod = pkg.strip("/\\").replace("/", ".").replace("\\", ".")
+    if mod.endswith(".py"):  # NOTE: Assumes submodule is not named `py`.
+        mod = mod[:-3]
+    return mod, cls
 
-        # try to convert path to module name
-        mod = pkg.strip("/\\").replace("/", ".").replace("\\", ".")
-        if mod.endswith(".py"):  # NOTE: Assumes submodule is not named `py`.
-            mod = mod[:-3]
 
+class PackageSpecAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
         # save the result in the arguments namespace as a tuple
-        setattr(namespace, self.dest, (mod, cls))
+        setattr(namespace, self.dest, parse_package_spec(values))
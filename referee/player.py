@@ -25,6 +25,13 @@ class PlayerWrapper:
     def __init__(self, name, player_loc, time_limit=None, space_limit=None):
         self.name = name
 
+        # make the per-player limits visible to players (see time_limit()
+        # and space_limit())
+        global _TIME_LIMIT, _SPACE_LIMIT, _SHARED_PROCESS
+        _TIME_LIMIT = time_limit or 0
+        _SPACE_LIMIT = space_limit or 0
+        _SHARED_PROCESS = True
+
         # create some context managers for resource limiting
         self.timer = _CountdownTimer(time_limit, self.name)
         if space_limit is not None:
@@ -202,6 +209,36 @@ def _get_space_usage():
 
 _DEFAULT_MEM_USAGE = 0
 
+_TIME_LIMIT = 0
+_SPACE_LIMIT = 0
+_SHARED_PROCESS = False
+
+
+def time_limit():
+    """
+    The CPU time limit (seconds) each player is allowed by the referee, or
+    0 if there is no limit. Players can use this to budget their search.
+    """
+    return _TIME_LIMIT
+
+
+def space_limit():
+    """
+    The memory limit (MB) each player is allowed by the referee, or 0 if
+    there is no limit. Players can use this to size their caches.
+    """
+    return _SPACE_LIMIT
+
+
+def shared_process():
+    """
+    True if the referee runs the players in this process. Time is then
+    measured as CPU time of the whole process, so any work a player does
+    outside its own calls (e.g. in a background thread) is billed to the
+    player the referee is timing at that moment.
+    """
+    return _SHARED_PROCESS
+
 _SPACE_ENABLED = False
 
 